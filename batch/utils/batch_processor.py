@@ -2,7 +2,9 @@ import os
 import gc
 from batch.utils.settings_check import check_settings
 from batch.utils.video_processor import process_video
-from core.utils.config_utils import load_key, update_key
+from core.utils.config_utils import load_key, update_keys
+from core.utils.ask_gpt import close_clients
+from core.spacy_utils import release_nlp_models
 import pandas as pd
 from rich.console import Console
 from rich.panel import Panel
@@ -15,10 +17,13 @@ def record_and_update_config(source_language, target_language):
     original_source_lang = load_key('whisper.language')
     original_target_lang = load_key('target_language')
     
+    updates = {}
     if source_language and not pd.isna(source_language):
-        update_key('whisper.language', source_language)
+        updates['whisper.language'] = source_language
     if target_language and not pd.isna(target_language):
-        update_key('target_language', target_language)
+        updates['target_language'] = target_language
+    if updates:
+        update_keys(updates)
     
     return original_source_lang, original_target_lang
 
@@ -78,8 +83,7 @@ def process_batch():
                 status_msg = f"Error: Unhandled exception - {str(e)}"
                 console.print(f"[bold red]Error processing {video_file}: {status_msg}")
             finally:
-                update_key('whisper.language', original_source_lang)
-                update_key('target_language', original_target_lang)
+                update_keys({'whisper.language': original_source_lang, 'target_language': original_target_lang})
                 
                 df.at[index, 'Status'] = status_msg
                 df.to_excel('batch/tasks_setting.xlsx', index=False)
@@ -90,6 +94,10 @@ def process_batch():
         else:
             print(f"Skipping task: {row['Video File']} - Status: {row['Status']}")
 
+    # the pooled LLM connections and spaCy pipelines are kept across videos, drop them once the batch is done
+    close_clients()
+    release_nlp_models()
+
     console.print(Panel("All tasks processed!\nCheck out in `batch/output`!", 
                        title="[bold green]Batch Processing Complete", expand=False))
 
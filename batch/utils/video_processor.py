@@ -26,7 +26,8 @@ def process_video(file, dubbing=False, is_retry=False):
         ("✂️ Splitting sentences", split_sentences),
         ("📝 Summarizing and translating", summarize_and_translate),
         ("⚡ Processing and aligning subtitles", process_and_align_subtitles),
-        ("🎬 Merging subtitles to video", _7_sub_into_vid.merge_subtitles_to_video),
+        # with dubbing, the subtitled video is rendered in the same ffmpeg pass as the dubbed one
+        ("🎬 Merging subtitles to video", partial(_7_sub_into_vid.merge_subtitles_to_video, render=not dubbing)),
     ]
     
     if dubbing:
@@ -35,7 +36,7 @@ def process_video(file, dubbing=False, is_retry=False):
             ("🎵 Extracting reference audio", _9_refer_audio.extract_refer_audio_main),
             ("🗣️ Generating audio", _10_gen_audio.gen_audio),
             ("🔄 Merging full audio", _11_merge_audio.merge_full_audio),
-            ("🎞️ Merging dubbing to video", _12_dub_to_vid.merge_video_audio),
+            ("🎞️ Merging dubbing to video", partial(_12_dub_to_vid.merge_video_audio, with_sub_video=True)),
         ]
         text_steps.extend(dubbing_steps)
     
@@ -60,6 +61,8 @@ def process_video(file, dubbing=False, is_retry=False):
                         border_style="red"
                     )
                     console.print(error_panel)
+                    if dubbing and step_name in dict(dubbing_steps):
+                        render_sub_video_fallback()
                     cleanup(ERROR_OUTPUT_DIR)
                     return False, current_step, str(e)
                 console.print(Panel(
@@ -71,6 +74,13 @@ def process_video(file, dubbing=False, is_retry=False):
     cleanup(SAVE_DIR)
     return True, "", ""
 
+def render_sub_video_fallback():
+    # with dubbing the subtitled video is only rendered by the last step, make it now so ERROR still gets it
+    try:
+        _7_sub_into_vid.merge_subtitles_to_video(capcut=False)
+    except Exception as e:
+        console.print(f"[yellow]⚠️ Failed to render the subtitled video: {e}[/yellow]")
+
 def prepare_output_folder(output_folder):
     if os.path.exists(output_folder):
         shutil.rmtree(output_folder)
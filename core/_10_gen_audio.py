@@ -4,7 +4,9 @@ import shutil
 import subprocess
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
+import soundfile as sf
 from pydub import AudioSegment
 from rich.console import Console
 from rich.progress import Progress
@@ -12,7 +14,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from core.utils import *
 from core.utils.models import *
-from core.asr_backend.audio_preprocess import get_audio_duration
+from core.utils.artifacts import load_audio_tasks, save_audio_tasks
+from core.utils.audio_probe import get_audio_duration
+from core.utils.time_stretch import wsola_stretch
 from core.tts_backend.tts_main import tts_main
 
 console = Console()
@@ -20,6 +24,7 @@ console = Console()
 TEMP_FILE_TEMPLATE = f"{_AUDIO_TMP_DIR}/{{}}_temp.wav"
 OUTPUT_FILE_TEMPLATE = f"{_AUDIO_SEGS_DIR}/{{}}.wav"
 WARMUP_SIZE = 5
+CHUNK_PAD_SECONDS = 0.05
 
 def parse_df_srt_time(time_str: str) -> float:
     """Convert SRT time format to seconds"""
@@ -62,12 +67,69 @@ def adjust_audio_speed(input_file: str, output_file: str, speed_factor: float) -
                 rprint(f"[red]❌ Audio speed adjustment failed, max retries reached ({max_retries})[/red]")
                 raise e
 
+def stretch_line(temp_file: str, output_file: str, speed_factor: float, engine: str) -> float:
+    """Time-stretch one TTS line and return its new duration, ffmpeg atempo is the fallback"""
+    if engine == "wsola":
+        try:
+            audio, sr = sf.read(temp_file, dtype='float32')
+            stretched = wsola_stretch(audio, speed_factor, sr)
+            sf.write(output_file, stretched, sr)
+            return len(stretched) / sr
+        except Exception as e:
+            rprint(f"[yellow]⚠️ In-process time-stretch failed for {temp_file}, falling back to ffmpeg: {e}[/yellow]")
+    adjust_audio_speed(temp_file, output_file, speed_factor)
+    return get_audio_duration(output_file)
+
+def stretch_chunk_wsola(files: list, speed_factor: float) -> list:
+    """One WSOLA pass over the whole chunk: lines are laid out with a little silence between them,
+    stretched together and cut apart again at their scaled offsets"""
+    flat = [pair for row_files in files for pair in row_files]
+    buffers, sr = [], None
+    for temp_file, _ in flat:
+        audio, file_sr = sf.read(temp_file, dtype='float32', always_2d=True)
+        if sr is not None and (file_sr != sr or audio.shape[1] != buffers[0].shape[1]):
+            raise ValueError("lines of the chunk differ in sample rate or channels")
+        sr = file_sr
+        buffers.append(audio)
+
+    # the pad is longer than a WSOLA frame plus its search range, so no line bleeds into the next
+    pad = np.zeros((int(sr * CHUNK_PAD_SECONDS), buffers[0].shape[1]), dtype=np.float32)
+    pieces, spans, pos = [], [], 0
+    for audio in buffers:
+        pieces.extend([pad, audio])
+        spans.append((pos + len(pad), pos + len(pad) + len(audio)))
+        pos += len(pad) + len(audio)
+    pieces.append(pad)
+    stretched = wsola_stretch(np.concatenate(pieces), speed_factor, sr)
+
+    durations = []
+    for (_, output_file), (start, end) in zip(flat, spans):
+        line = stretched[int(round(start / speed_factor)):int(round(end / speed_factor))]
+        sf.write(output_file, line if line.shape[1] > 1 else line[:, 0], sr)
+        durations.append(len(line) / sr)
+    it = iter(durations)
+    return [[next(it) for _ in row_files] for row_files in files]
+
+def stretch_chunk_lines(chunk_df: pd.DataFrame, speed_factor: float) -> list:
+    """Stretch every line of a chunk in one pass, returns the new durations per row"""
+    engine = load_key("time_stretch")
+    files = [
+        [(TEMP_FILE_TEMPLATE.format(f"{row['number']}_{line_index}"), OUTPUT_FILE_TEMPLATE.format(f"{row['number']}_{line_index}"))
+         for line_index in range(len(row['lines']))]
+        for _, row in chunk_df.iterrows()
+    ]
+    if engine == "wsola" and abs(speed_factor - 1.0) >= 0.001:
+        try:
+            return stretch_chunk_wsola(files, speed_factor)
+        except Exception as e:
+            rprint(f"[yellow]⚠️ Chunk time-stretch failed, stretching line by line: {e}[/yellow]")
+    return [[stretch_line(temp_file, output_file, speed_factor, engine) for temp_file, output_file in row_files] for row_files in files]
+
 def process_row(row: pd.Series, tasks_df: pd.DataFrame) -> Tuple[int, float]:
     """Helper function for processing single row data"""
     number = row['number']
-    lines = eval(row['lines']) if isinstance(row['lines'], str) else row['lines']
     real_dur = 0
-    for line_index, line in enumerate(lines):
+    for line_index, line in enumerate(row['lines']):
         temp_file = TEMP_FILE_TEMPLATE.format(f"{number}_{line_index}")
         tts_main(line, temp_file, number, tasks_df)
         real_dur += get_audio_duration(temp_file)
@@ -152,7 +214,10 @@ def merge_chunks(tasks_df: pd.DataFrame) -> pd.DataFrame:
             chunk_df = tasks_df.iloc[chunk_start:index+1].reset_index(drop=True)
             speed_factor, keep_gaps = process_chunk(chunk_df, accept, min_speed)
             
-            # 🎯 Step1: Start processing new timeline
+            # 🔄 Step1: Speed change every line of the chunk and save as OUTPUT_FILE_TEMPLATE
+            chunk_durations = stretch_chunk_lines(chunk_df, speed_factor)
+
+            # 🎯 Step2: Start processing new timeline
             chunk_start_time = parse_df_srt_time(chunk_df.iloc[0]['start_time'])
             chunk_end_time = parse_df_srt_time(chunk_df.iloc[-1]['end_time']) + chunk_df.iloc[-1]['tolerance'] # 加上tolerance才是这一块的结束
             cur_time = chunk_start_time
@@ -161,14 +226,7 @@ def merge_chunks(tasks_df: pd.DataFrame) -> pd.DataFrame:
                 if i != 0 and keep_gaps:
                     cur_time += chunk_df.iloc[i-1]['gap']/speed_factor
                 new_sub_times = []
-                number = row['number']
-                lines = eval(row['lines']) if isinstance(row['lines'], str) else row['lines']
-                for line_index, line in enumerate(lines):
-                    # 🔄 Step2: Start speed change and save as OUTPUT_FILE_TEMPLATE
-                    temp_file = TEMP_FILE_TEMPLATE.format(f"{number}_{line_index}")
-                    output_file = OUTPUT_FILE_TEMPLATE.format(f"{number}_{line_index}")
-                    adjust_audio_speed(temp_file, output_file, speed_factor)
-                    ad_dur = get_audio_duration(output_file)
+                for ad_dur in chunk_durations[i]:
                     new_sub_times.append([cur_time, cur_time+ad_dur])
                     cur_time += ad_dur
                 # 🔄 Step3: Find corresponding main DataFrame index and update new_sub_times
@@ -184,16 +242,14 @@ def merge_chunks(tasks_df: pd.DataFrame) -> pd.DataFrame:
                     rprint(f"[yellow]⚠️ Chunk {chunk_start} to {index} exceeds by {time_diff:.3f}s, truncating last audio[/yellow]")
                     # Get the last audio file
                     last_number = tasks_df.iloc[index]['number']
-                    last_lines = eval(tasks_df.iloc[index]['lines']) if isinstance(tasks_df.iloc[index]['lines'], str) else tasks_df.iloc[index]['lines']
-                    last_line_index = len(last_lines) - 1
+                    last_line_index = len(tasks_df.iloc[index]['lines']) - 1
                     last_file = OUTPUT_FILE_TEMPLATE.format(f"{last_number}_{last_line_index}")
                     
                     # Calculate the duration to keep
-                    audio = AudioSegment.from_wav(last_file)
-                    original_duration = len(audio) / 1000  # Convert to seconds
+                    audio, sr = sf.read(last_file)
+                    original_duration = len(audio) / sr
                     new_duration = original_duration - time_diff
-                    trimmed_audio = audio[:(new_duration * 1000)]  # pydub uses milliseconds
-                    trimmed_audio.export(last_file, format="wav")
+                    sf.write(last_file, audio[:int(new_duration * sr)], sr)
                     
                     # Update the last timestamp
                     last_times = tasks_df.at[index, 'new_sub_times']
@@ -215,7 +271,7 @@ def gen_audio() -> None:
     os.makedirs(_AUDIO_SEGS_DIR, exist_ok=True)
     
     # 📝 Step2: Load task file
-    tasks_df = pd.read_excel(_8_1_AUDIO_TASK)
+    tasks_df = load_audio_tasks(_8_1_AUDIO_TASK)
     rprint("[green]📊 Loaded task file successfully[/green]")
     
     # 🔊 Step3: Generate TTS audio
@@ -225,7 +281,7 @@ def gen_audio() -> None:
     tasks_df = merge_chunks(tasks_df)
     
     # 💾 Step5: Save results
-    tasks_df.to_excel(_8_1_AUDIO_TASK, index=False)
+    save_audio_tasks(tasks_df, _8_1_AUDIO_TASK)
     rprint("[bold green]🎉 Audio generation completed successfully![/bold green]")
 
 if __name__ == "__main__":
@@ -1,11 +1,14 @@
 import os
-import pandas as pd
+import math
+import numpy as np
 import subprocess
-from pydub import AudioSegment
+import soundfile as sf
+from scipy.signal import resample_poly
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.console import Console
 from core.utils import *
 from core.utils.models import *
+from core.utils.artifacts import load_audio_tasks
 console = Console()
 
 DUB_VOCAL_FILE = 'output/dub.mp3'
@@ -13,14 +16,12 @@ DUB_VOCAL_FILE = 'output/dub.mp3'
 DUB_SUB_FILE = 'output/dub.srt'
 OUTPUT_FILE_TEMPLATE = f"{_AUDIO_SEGS_DIR}/{{}}.wav"
 
-def load_and_flatten_data(excel_file):
-    """Load and flatten Excel data"""
-    df = pd.read_excel(excel_file)
-    lines = [eval(line) if isinstance(line, str) else line for line in df['lines'].tolist()]
-    lines = [item for sublist in lines for item in sublist]
-    
-    new_sub_times = [eval(time) if isinstance(time, str) else time for time in df['new_sub_times'].tolist()]
-    new_sub_times = [item for sublist in new_sub_times for item in sublist]
+def load_and_flatten_data(task_file):
+    """Load and flatten audio task data"""
+    df = load_audio_tasks(task_file)
+    lines = [line for row_lines in df['lines'] for line in row_lines]
+    # (n, 2) start / end seconds, one row per dubbed line
+    new_sub_times = np.concatenate(df['new_sub_times'].tolist()) if len(df) else np.zeros((0, 2))
     
     return df, lines, new_sub_times
 
@@ -29,58 +30,69 @@ def get_audio_files(df):
     audios = []
     for index, row in df.iterrows():
         number = row['number']
-        line_count = len(eval(row['lines']) if isinstance(row['lines'], str) else row['lines'])
-        for line_index in range(line_count):
+        for line_index in range(len(row['lines'])):
             temp_file = OUTPUT_FILE_TEMPLATE.format(f"{number}_{line_index}")
             audios.append(temp_file)
     return audios
 
-def process_audio_segment(audio_file):
-    """Process a single audio segment with MP3 compression"""
-    temp_file = f"{audio_file}_temp.mp3"
-    ffmpeg_cmd = [
-        'ffmpeg', '-y',
-        '-i', audio_file,
-        '-ar', '16000',
-        '-ac', '1',
-        '-b:a', '64k',
-        temp_file
-    ]
-    subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    audio_segment = AudioSegment.from_mp3(temp_file)
-    os.remove(temp_file)
-    return audio_segment
+def load_audio_segment(audio_file, sample_rate):
+    """Decode a dubbed line to mono float32 at sample_rate"""
+    audio, sr = sf.read(audio_file, dtype='float32', always_2d=True)
+    audio = audio.mean(axis=1)
+    if sr != sample_rate:
+        g = math.gcd(sr, sample_rate)
+        audio = resample_poly(audio, sample_rate // g, sr // g).astype(np.float32)
+    return audio
+
+# the timeline is assembled and encoded block by block, memory does not grow with the video length
+BLOCK_SECONDS = 10
 
-def merge_audio_segments(audios, new_sub_times, sample_rate):
-    merged_audio = AudioSegment.silent(duration=0, frame_rate=sample_rate)
+def merge_audio_segments(audios, new_sub_times, sample_rate, output_file):
+    """Mix every line at its start offset and stream the track into a 64k mp3 encoder"""
+    items = sorted(((max(start_time, 0), audio_file) for audio_file, (start_time, _) in zip(audios, new_sub_times)), key=lambda item: item[0])
+    end_sample = int(math.ceil(max((end for _, end in new_sub_times), default=0) * sample_rate))
+    block = int(BLOCK_SECONDS * sample_rate)
+
+    cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', '-', '-b:a', '64k', output_file]
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    active, next_item, block_start = [], 0, 0
     
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(), TaskProgressColumn()) as progress:
-        merge_task = progress.add_task("🎵 Merging audio segments...", total=len(audios))
-        
-        for i, (audio_file, time_range) in enumerate(zip(audios, new_sub_times)):
-            if not os.path.exists(audio_file):
-                console.print(f"[bold yellow]⚠️  Warning: File {audio_file} does not exist, skipping...[/bold yellow]")
-                progress.advance(merge_task)
-                continue
-                
-            audio_segment = process_audio_segment(audio_file)
-            start_time, end_time = time_range
+    try:
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(), TaskProgressColumn()) as progress:
+            merge_task = progress.add_task("🎵 Merging audio segments...", total=len(audios))
             
-            # Add silence segment
-            if i > 0:
-                prev_end = new_sub_times[i-1][1]
-                silence_duration = start_time - prev_end
-                if silence_duration > 0:
-                    silence = AudioSegment.silent(duration=int(silence_duration * 1000), frame_rate=sample_rate)
-                    merged_audio += silence
-            elif start_time > 0:
-                silence = AudioSegment.silent(duration=int(start_time * 1000), frame_rate=sample_rate)
-                merged_audio += silence
-                
-            merged_audio += audio_segment
-            progress.advance(merge_task)
-    
-    return merged_audio
+            while block_start < end_sample:
+                block_end = block_start + block
+                # decode the lines that start inside this block
+                while next_item < len(items) and int(items[next_item][0] * sample_rate) < block_end:
+                    start_time, audio_file = items[next_item]
+                    next_item += 1
+                    progress.advance(merge_task)
+                    if not os.path.exists(audio_file):
+                        console.print(f"[bold yellow]⚠️  Warning: File {audio_file} does not exist, skipping...[/bold yellow]")
+                        continue
+                    audio_segment = load_audio_segment(audio_file, sample_rate)
+                    offset = int(start_time * sample_rate)
+                    active.append((offset, audio_segment))
+                    end_sample = max(end_sample, offset + len(audio_segment))
+
+                out = np.zeros(block, dtype=np.float32)
+                for offset, audio_segment in active:
+                    lo, hi = max(offset, block_start), min(offset + len(audio_segment), block_end)
+                    if lo < hi:
+                        out[lo - block_start:hi - block_start] += audio_segment[lo - offset:hi - offset]
+                active = [(offset, audio_segment) for offset, audio_segment in active if offset + len(audio_segment) > block_end]
+
+                process.stdin.write(np.clip(out[:min(block, end_sample - block_start)], -1, 1).tobytes())
+                block_start = block_end
+    except BrokenPipeError:
+        pass
+    finally:
+        process.stdin.close()
+        stderr = process.stderr.read()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg failed to encode {output_file}: {stderr.decode('utf-8', errors='ignore')}")
 
 def create_srt_subtitle():
     df, lines, new_sub_times = load_and_flatten_data(_8_1_AUDIO_TASK)
@@ -100,7 +112,7 @@ def merge_full_audio():
     """Main function: Process the complete audio merging process"""
     console.print("\n[bold cyan]🎬 Starting audio merging process...[/bold cyan]")
     
-    with console.status("[bold cyan]📊 Loading data from Excel...[/bold cyan]"):
+    with console.status("[bold cyan]📊 Loading audio tasks...[/bold cyan]"):
         df, lines, new_sub_times = load_and_flatten_data(_8_1_AUDIO_TASK)
     console.print("[bold green]✅ Data loaded successfully[/bold green]")
     
@@ -119,11 +131,7 @@ def merge_full_audio():
     console.print(f"[bold green]✅ Sample rate: {sample_rate}Hz[/bold green]")
 
     console.print("[bold cyan]🔄 Starting audio merge process...[/bold cyan]")
-    merged_audio = merge_audio_segments(audios, new_sub_times, sample_rate)
-    
-    with console.status("[bold cyan]💾 Exporting final audio file...[/bold cyan]"):
-        merged_audio = merged_audio.set_frame_rate(16000).set_channels(1)
-        merged_audio.export(DUB_VOCAL_FILE, format="mp3", parameters=["-b:a", "64k"])
+    merge_audio_segments(audios, new_sub_times, sample_rate, DUB_VOCAL_FILE)
     console.print(f"[bold green]✅ Audio file successfully merged![/bold green]")
     console.print(f"[bold green]📁 Output file: {DUB_VOCAL_FILE}[/bold green]")
 
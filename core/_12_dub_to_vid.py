@@ -9,12 +9,13 @@ import requests
 from rich.console import Console
 
 from core._1_ytdlp import find_video_files
-from core.asr_backend.audio_preprocess import normalize_audio_volume
+from core.asr_backend.audio_preprocess import measure_volume_gain
 from core.utils import *
 from core.utils.models import *
 from core.capcut_process.request_capcut_api import create_draft, add_video_impl, add_audio_track, add_subtitle, save_draft
 
 from core._11_merge_audio import load_and_flatten_data, get_audio_files
+from core._7_sub_into_vid import get_scale_pad_filter, get_src_trans_subtitle_filter, OUTPUT_VIDEO as SUB_VIDEO, SRC_SRT, TRANS_SRT
 
 console = Console()
 
@@ -124,8 +125,9 @@ def create_capcut_draft(video_file, TARGET_WIDTH, TARGET_HEIGHT):
     
     return draft_id
 
-def merge_video_audio():
-    """Merge video and audio, and reduce video volume"""
+def merge_video_audio(with_sub_video=False):
+    """Merge video and audio, and reduce video volume.
+    With with_sub_video=True the subtitled video of _7 is rendered from the same decode as the dubbed one."""
     VIDEO_FILE = find_video_files()
     background_file = _BACKGROUND_AUDIO_FILE
 
@@ -151,9 +153,13 @@ def merge_video_audio():
         rprint("[bold green]Placeholder video has been generated.[/bold green]")
         return
 
-    # Normalize dub audio
-    normalized_dub_audio = 'output/normalized_dub.wav'
-    normalize_audio_volume(DUB_AUDIO, normalized_dub_audio)
+    if with_sub_video and (not os.path.exists(SRC_SRT) or not os.path.exists(TRANS_SRT)):
+        rprint("Subtitle files not found in the 'output' directory.")
+        exit(1)
+
+    # Normalize dub audio inside the filter graph instead of a separate encode
+    dub_dBFS, dub_gain = measure_volume_gain(DUB_AUDIO)
+    rprint(f"[green]✅ Dub audio will be normalized from {dub_dBFS:.1f}dB to -20.0dB[/green]")
     
     # Merge video and audio with translated subtitles
     rprint(f"[bold green]Video resolution: {TARGET_WIDTH}x{TARGET_HEIGHT}[/bold green]")
@@ -165,24 +171,37 @@ def merge_video_audio():
         f"BackColour={TRANS_BACK_COLOR},Alignment=2,MarginV=27,BorderStyle=4'"
     )
     
+    # one decode of the source video, split into the subtitled and the dubbed output when both are wanted
+    if with_sub_video:
+        video_graph = (
+            f'[0:v]{get_scale_pad_filter(TARGET_WIDTH, TARGET_HEIGHT)},split=2[vs][vd];'
+            f'[vs]{get_src_trans_subtitle_filter()}[vsub];'
+            f'[vd]{subtitle_filter}[v];'
+        )
+    else:
+        video_graph = f'[0:v]{get_scale_pad_filter(TARGET_WIDTH, TARGET_HEIGHT)},{subtitle_filter}[v];'
+
     cmd = [
-        'ffmpeg', '-y', '-i', VIDEO_FILE, '-i', background_file, '-i', normalized_dub_audio,
+        'ffmpeg', '-y', '-i', VIDEO_FILE, '-i', background_file, '-i', DUB_AUDIO,
         '-filter_complex',
-        f'[0:v]scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,'
-        f'pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2,'
-        f'{subtitle_filter}[v];'
-        f'[1:a][2:a]amix=inputs=2:duration=first:dropout_transition=3[a]'
+        video_graph +
+        f'[2:a]volume={dub_gain:.4f}dB[dub];'
+        f'[1:a][dub]amix=inputs=2:duration=first:dropout_transition=3[a]'
     ]
 
+    video_codec = []
     if load_key("ffmpeg_gpu"):
         rprint("[bold green]Using GPU acceleration...[/bold green]")
-        cmd.extend(['-map', '[v]', '-map', '[a]', '-c:v', 'h264_nvenc'])
-    else:
-        cmd.extend(['-map', '[v]', '-map', '[a]'])
-    
-    cmd.extend(['-c:a', 'aac', '-b:a', '96k', DUB_VIDEO])
+        video_codec = ['-c:v', 'h264_nvenc']
+
+    if with_sub_video:
+        cmd.extend(['-map', '[vsub]', '-map', '0:a?'] + video_codec + [SUB_VIDEO])
+    cmd.extend(['-map', '[v]', '-map', '[a]'] + video_codec + ['-c:a', 'aac', '-b:a', '96k', DUB_VIDEO])
     
-    subprocess.run(cmd)
+    # a failed encode must fail the step, the batch fallback re-renders the subtitled video then
+    subprocess.run(cmd, check=True)
+    if with_sub_video:
+        rprint(f"[bold green]Subtitles successfully merged into {SUB_VIDEO}[/bold green]")
     rprint(f"[bold green]Video and audio successfully merged into {DUB_VIDEO}[/bold green]")
 
 if __name__ == '__main__':
@@ -1,3 +1,4 @@
+import concurrent.futures
 from core.utils import *
 from core.asr_backend.demucs_vl import demucs_audio
 from core.asr_backend.audio_preprocess import process_transcription, convert_video_to_audio, split_audio, save_results, normalize_audio_volume
@@ -18,13 +19,17 @@ def transcribe():
         vocal_audio = _RAW_AUDIO_FILE
 
     # 3. Extract audio
-    segments = split_audio(_RAW_AUDIO_FILE)
+    runtime = load_key("whisper.runtime")
+    remote = runtime in ("cloud", "elevenlabs")
+    if remote:
+        segments = split_audio(_RAW_AUDIO_FILE, target_len=load_key("whisper.remote_target_len"))
+    else:
+        segments = split_audio(_RAW_AUDIO_FILE)
     
     # 4. Transcribe audio by clips
     all_results = []
-    runtime = load_key("whisper.runtime")
     if runtime == "local":
-        from core.asr_backend.whisperX_local import transcribe_audio as ts
+        from core.asr_backend.whisperX_local import transcribe_audio as ts, release_models
         rprint("[cyan]🎤 Transcribing audio with local model...[/cyan]")
     elif runtime == "cloud":
         from core.asr_backend.whisperX_302 import transcribe_audio_302 as ts
@@ -33,9 +38,18 @@ def transcribe():
         from core.asr_backend.elevenlabs_asr import transcribe_audio_elevenlabs as ts
         rprint("[cyan]🎤 Transcribing audio with ElevenLabs API...[/cyan]")
 
-    for start, end in segments:
-        result = ts(_RAW_AUDIO_FILE, vocal_audio, start, end)
-        all_results.append(result)
+    if remote:
+        # remote APIs are IO bound, keep several segments in flight, map() keeps the segment order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, load_key("whisper.remote_workers"))) as executor:
+            all_results = list(executor.map(lambda seg: ts(_RAW_AUDIO_FILE, vocal_audio, seg[0], seg[1]), segments))
+    else:
+        try:
+            for start, end in segments:
+                result = ts(_RAW_AUDIO_FILE, vocal_audio, start, end)
+                all_results.append(result)
+        finally:
+            if not load_key("whisper.keep_models_loaded"):
+                release_models()
     
     # 5. Combine results
     combined_result = {'segments': []}
@@ -1,14 +1,16 @@
 from core.spacy_utils import *
+from core.spacy_utils.load_nlp_model import UNUSED_PIPES
 from core.utils.models import _3_1_SPLIT_BY_NLP
 from core.utils import check_file_exists
 
 @check_file_exists(_3_1_SPLIT_BY_NLP)
 def split_by_spacy():
-    nlp = init_nlp()
-    split_by_mark(nlp)
-    split_by_comma_main(nlp)
-    split_sentences_main(nlp)
-    split_long_by_root_main(nlp)
+    nlp = init_nlp(disable=UNUSED_PIPES)
+    # parse once, every stage cuts spans of the same doc
+    spans = split_by_mark(nlp)
+    spans = split_by_comma_main(spans)
+    spans = split_sentences_main(spans)
+    split_long_by_root_main(spans)
     return
 
 if __name__ == '__main__':
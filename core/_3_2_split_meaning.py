@@ -1,17 +1,40 @@
 import concurrent.futures
 from difflib import SequenceMatcher
 import math
-from core.prompts import get_split_prompt
-from core.spacy_utils.load_nlp_model import init_nlp
+from core.prompts import get_split_prompt, get_batch_split_prompt
+from core.spacy_utils.load_nlp_model import init_tokenizer
 from core.utils import *
 from rich.console import Console
 from rich.table import Table
 from core.utils.models import _3_1_SPLIT_BY_NLP, _3_2_SPLIT_BY_MEANING
+from core.utils.llm_scheduler import PRIORITY_BULK
 console = Console()
 
-def tokenize_sentence(sentence, nlp):
-    doc = nlp(sentence)
-    return [token.text for token in doc]
+SPLIT_RESPONSE_KEYS = ["analysis", "split1", "split2", "assess", "choice"]
+
+def tokenize_sentences(sentences, nlp):
+    # only token counts are needed, the tokenizer alone gives the same tokens as the full pipeline
+    docs = nlp.tokenizer.pipe(sentences, batch_size=load_key("spacy_pipe.batch_size"))
+    return [[token.text for token in doc] for doc in docs]
+
+def _scan_split_position(original, start, modified_left):
+    """Fallback: try every candidate end position, quadratic but robust"""
+    max_similarity, best_split = 0, None
+    for j in range(start, len(original)):
+        left_similarity = SequenceMatcher(None, original[start:j], modified_left).ratio()
+        if left_similarity > max_similarity:
+            max_similarity = left_similarity
+            best_split = j
+    return best_split
+
+def _map_end_position(blocks, end):
+    """Map an exclusive end offset in the modified text to the original text via matching blocks"""
+    mapped = None
+    for a, b, size in blocks:
+        if size == 0 or b >= end:
+            break
+        mapped = a + min(size, end - b)
+    return mapped
 
 def find_split_positions(original, modified):
     split_positions = []
@@ -21,23 +44,24 @@ def find_split_positions(original, modified):
     language = load_key("whisper.detected_language") if whisper_language == 'auto' else whisper_language
     joiner = get_joiner(language)
 
-    for i in range(len(parts) - 1):
-        max_similarity = 0
-        best_split = None
-
-        for j in range(start, len(original)):
-            original_left = original[start:j]
-            modified_left = joiner.join(parts[i].split())
+    # align the whole answer against the original once, then read every split point off the alignment
+    modified_parts = [joiner.join(part.split()) for part in parts]
+    modified_full, part_ends = '', []
+    for i, part in enumerate(modified_parts):
+        modified_full += (joiner if i > 0 else '') + part
+        part_ends.append(len(modified_full))
+    blocks = SequenceMatcher(None, original, modified_full, autojunk=False).get_matching_blocks()
 
-            left_similarity = SequenceMatcher(None, original_left, modified_left).ratio()
-
-            if left_similarity > max_similarity:
-                max_similarity = left_similarity
-                best_split = j
+    for i in range(len(parts) - 1):
+        modified_left = modified_parts[i]
+        best_split = _map_end_position(blocks, part_ends[i])
+        if best_split is None or not start < best_split < len(original):
+            best_split = _scan_split_position(original, start, modified_left)
 
-        if max_similarity < 0.9:
-            console.print(f"[yellow]Warning: low similarity found at the best split point: {max_similarity}[/yellow]")
         if best_split is not None:
+            similarity = SequenceMatcher(None, original[start:best_split], modified_left).ratio()
+            if similarity < 0.9:
+                console.print(f"[yellow]Warning: low similarity found at the best split point: {similarity}[/yellow]")
             split_positions.append(best_split)
             start = best_split
         else:
@@ -55,10 +79,23 @@ def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0
         if "[br]" not in response_data[f"split{choice}"]:
             return {"status": "error", "message": "Split failed, no [br] found"}
         return {"status": "success", "message": "Split completed"}
+    def valid_partial_split(response_data):
+        # both splits are complete once `assess` has started streaming
+        if not isinstance(response_data, dict):
+            return {"status": "error", "message": "Response is not a json object"}
+        unexpected_keys = set(response_data.keys()) - set(SPLIT_RESPONSE_KEYS)
+        if unexpected_keys:
+            return {"status": "error", "message": f"Unexpected key(s): {', '.join(sorted(unexpected_keys))}"}
+        if "assess" in response_data and not any("[br]" in str(response_data.get(key, "")) for key in ("split1", "split2")):
+            return {"status": "error", "message": "Split failed, no [br] found"}
+        return {"status": "success", "message": ""}
     
-    response_data = ask_gpt(split_prompt + " " * retry_attempt, resp_type='json', valid_def=valid_split, log_title='split_by_meaning')
+    response_data = ask_gpt(split_prompt + " " * retry_attempt, resp_type='json', valid_def=valid_split, log_title='split_by_meaning', priority=PRIORITY_BULK, partial_valid_def=valid_partial_split)
     choice = response_data["choice"]
-    best_split = response_data[f"split{choice}"]
+    return apply_split(sentence, response_data[f"split{choice}"], index)
+
+def apply_split(sentence, best_split, index=-1):
+    """Map the [br] positions of the LLM answer back onto the original sentence"""
     split_points = find_split_positions(sentence, best_split)
     # split the sentence based on the split points
     for i, split_point in enumerate(split_points):
@@ -80,30 +117,76 @@ def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0
     
     return best_split
 
+def split_sentences_batch(items, word_limit=20, retry_attempt=0):
+    """Split several long sentences with one request, items: list of (index, sentence, num_parts).
+    Items that fail validation are split again in smaller batches, down to single requests."""
+    if len(items) == 1:
+        index, sentence, num_parts = items[0]
+        return {index: split_sentence(sentence, num_parts, word_limit, index=index, retry_attempt=retry_attempt)}
+
+    prompt = get_batch_split_prompt([(i + 1, sentence, num_parts) for i, (_, sentence, num_parts) in enumerate(items)], word_limit)
+    def valid_batch(response_data):
+        if not isinstance(response_data, dict):
+            return {"status": "error", "message": "Response is not a json object"}
+        return {"status": "success", "message": "Batch split completed"}
+    def valid_partial_batch(response_data):
+        if not isinstance(response_data, dict):
+            return {"status": "error", "message": "Response is not a json object"}
+        unexpected_keys = set(response_data.keys()) - {str(i + 1) for i in range(len(items))}
+        if unexpected_keys:
+            return {"status": "error", "message": f"Unexpected key(s): {', '.join(sorted(unexpected_keys))}"}
+        return {"status": "success", "message": ""}
+
+    try:
+        response_data = ask_gpt(prompt + " " * retry_attempt, resp_type='json', valid_def=valid_batch, log_title='split_by_meaning_batch', priority=PRIORITY_BULK, partial_valid_def=valid_partial_batch)
+    except Exception as e:
+        console.print(f"[yellow]Warning: batch split of {len(items)} sentences failed: {e}[/yellow]")
+        response_data = {}
+
+    results, failed = {}, []
+    for i, (index, sentence, num_parts) in enumerate(items):
+        item = response_data.get(str(i + 1))
+        split = item.get("split") if isinstance(item, dict) else item
+        if isinstance(split, str) and "[br]" in split:
+            results[index] = apply_split(sentence, split, index)
+        else:
+            failed.append((index, sentence, num_parts))
+
+    if failed:
+        console.print(f"[yellow]Warning: {len(failed)}/{len(items)} sentences failed in batch, retrying with smaller batches[/yellow]")
+        half = math.ceil(len(failed) / 2)
+        for sub_items in (failed[:half], failed[half:]):
+            if sub_items:
+                results.update(split_sentences_batch(sub_items, word_limit, retry_attempt))
+    return results
+
 def parallel_split_sentences(sentences, max_length, max_workers, nlp, retry_attempt=0):
     """Split sentences in parallel using a thread pool."""
     new_sentences = [None] * len(sentences)
-    futures = []
+    to_split = []
 
+    for index, (sentence, tokens) in enumerate(zip(sentences, tokenize_sentences(sentences, nlp))):
+        num_parts = math.ceil(len(tokens) / max_length)
+        if len(tokens) > max_length:
+            to_split.append((index, sentence, num_parts))
+        else:
+            new_sentences[index] = [sentence]
+
+    batch_size = max(1, load_key("split_batch_size"))
+    batches = [to_split[i:i + batch_size] for i in range(0, len(to_split), batch_size)]
+    split_results = {}
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for index, sentence in enumerate(sentences):
-            # Use tokenizer to split the sentence
-            tokens = tokenize_sentence(sentence, nlp)
-            # print("Tokenization result:", tokens)
-            num_parts = math.ceil(len(tokens) / max_length)
-            if len(tokens) > max_length:
-                future = executor.submit(split_sentence, sentence, num_parts, max_length, index=index, retry_attempt=retry_attempt)
-                futures.append((future, index, num_parts, sentence))
-            else:
-                new_sentences[index] = [sentence]
-
-        for future, index, num_parts, sentence in futures:
-            split_result = future.result()
-            if split_result:
-                split_lines = split_result.strip().split('\n')
-                new_sentences[index] = [line.strip() for line in split_lines]
-            else:
-                new_sentences[index] = [sentence]
+        futures = [executor.submit(split_sentences_batch, batch, max_length, retry_attempt) for batch in batches]
+        for future in futures:
+            split_results.update(future.result())
+
+    for index, sentence, num_parts in to_split:
+        split_result = split_results.get(index)
+        if split_result:
+            split_lines = split_result.strip().split('\n')
+            new_sentences[index] = [line.strip() for line in split_lines]
+        else:
+            new_sentences[index] = [sentence]
 
     return [sentence for sublist in new_sentences for sentence in sublist]
 
@@ -114,7 +197,7 @@ def split_sentences_by_meaning():
     with open(_3_1_SPLIT_BY_NLP, 'r', encoding='utf-8') as f:
         sentences = [line.strip() for line in f.readlines()]
 
-    nlp = init_nlp()
+    nlp = init_tokenizer()
     # 🔄 process sentences multiple times to ensure all are split
     for retry_attempt in range(3):
         sentences = parallel_split_sentences(sentences, max_length=load_key("max_split_length"), max_workers=load_key("max_workers"), nlp=nlp, retry_attempt=retry_attempt)
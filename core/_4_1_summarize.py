@@ -3,6 +3,7 @@ from core.prompts import get_summary_prompt
 import pandas as pd
 from core.utils import *
 from core.utils.models import _3_2_SPLIT_BY_MEANING, _4_1_TERMINOLOGY
+from core.utils.llm_scheduler import PRIORITY_HIGH
 
 CUSTOM_TERMS_PATH = 'custom_terms.xlsx'
 
@@ -59,7 +60,7 @@ def get_summary():
                 return {"status": "error", "message": "Invalid response format"}   
         return {"status": "success", "message": "Summary completed"}
 
-    summary = ask_gpt(summary_prompt, resp_type='json', valid_def=valid_summary, log_title='summary')
+    summary = ask_gpt(summary_prompt, resp_type='json', valid_def=valid_summary, log_title='summary', priority=PRIORITY_HIGH)
     summary['terms'].extend(custom_terms_json['terms'])
     
     with open(_4_1_TERMINOLOGY, 'w', encoding='utf-8') as f:
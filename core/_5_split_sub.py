@@ -9,6 +9,7 @@ from rich.console import Console
 from rich.table import Table
 from core.utils import *
 from core.utils.models import *
+from core.utils.artifacts import load_artifact, save_artifact
 console = Console()
 
 # ! You can modify your own weights here
@@ -96,7 +97,7 @@ def split_align_subs(src_lines: List[str], tr_lines: List[str]):
 def split_for_sub_main():
     console.print("[bold green]🚀 Start splitting subtitles...[/bold green]")
     
-    df = pd.read_excel(_4_2_TRANSLATION)
+    df = load_artifact(_4_2_TRANSLATION)
     src = df['Source'].tolist()
     trans = df['Translation'].tolist()
     
@@ -122,8 +123,8 @@ def split_for_sub_main():
     elif len(remerged) > len(src):
         src += [None] * (len(remerged) - len(src))
     
-    pd.DataFrame({'Source': split_src, 'Translation': split_trans}).to_excel(_5_SPLIT_SUB, index=False)
-    pd.DataFrame({'Source': src, 'Translation': remerged}).to_excel(_5_REMERGED, index=False)
+    save_artifact(pd.DataFrame({'Source': split_src, 'Translation': split_trans}), _5_SPLIT_SUB)
+    save_artifact(pd.DataFrame({'Source': src, 'Translation': remerged}), _5_REMERGED)
 
 if __name__ == '__main__':
     split_for_sub_main()
@@ -1,11 +1,15 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+import hashlib
+from difflib import SequenceMatcher
 from rich.panel import Panel
 from rich.console import Console
 import autocorrect_py as autocorrect
 from core.utils import *
 from core.utils.models import *
+from core.utils.artifacts import load_artifact
 console = Console()
 
 SUBTITLE_OUTPUT_CONFIGS = [ 
@@ -20,18 +24,25 @@ AUDIO_SUBTITLE_OUTPUT_CONFIGS = [
     ('trans_subs_for_audio.srt', ['Translation'])
 ]
 
-def convert_to_srt_format(start_time, end_time):
-    """Convert time (in seconds) to the format: hours:minutes:seconds,milliseconds"""
-    def seconds_to_hmsm(seconds):
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        milliseconds = int(seconds * 1000) % 1000
-        return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
-
-    start_srt = seconds_to_hmsm(start_time)
-    end_srt = seconds_to_hmsm(end_time)
-    return f"{start_srt} --> {end_srt}"
+# a sentence without an exact match is searched fuzzily this many chars ahead of the cursor
+FUZZY_WINDOW_CHARS = 2000
+FUZZY_MIN_RATIO = 0.8
+# the matched span may not be much longer than the sentence, or it swallows the next sentences
+FUZZY_MAX_SPAN_RATIO = 1.2
+
+def format_srt_times(seconds):
+    """Convert an array of seconds to hours:minutes:seconds,milliseconds strings"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    hours = (seconds // 3600).astype(np.int64)
+    minutes = ((seconds % 3600) // 60).astype(np.int64)
+    seconds = seconds % 60
+    milliseconds = (seconds * 1000).astype(np.int64) % 1000
+    seconds = seconds.astype(np.int64)
+    return [f"{h:02d}:{m:02d}:{s:02d},{ms:03d}" for h, m, s, ms in zip(hours.tolist(), minutes.tolist(), seconds.tolist(), milliseconds.tolist())]
+
+def convert_to_srt_format(starts, ends):
+    """Convert start / end arrays (in seconds) to SRT timestamp lines"""
+    return [f"{start} --> {end}" for start, end in zip(format_srt_times(starts), format_srt_times(ends))]
 
 def remove_punctuation(text):
     text = re.sub(r'\s+', ' ', text)
@@ -56,87 +67,154 @@ def show_difference(str1, str2):
     print("Position markers: " + "".join("^" if i in diff_positions else " " for i in range(max(len(str1), len(str2)))))
     print(f"Difference indices: {diff_positions}")
 
+def build_word_string(words):
+    """Concatenate normalized words, returns the string and the char offset where each word ends"""
+    clean_words = [remove_punctuation(word.lower()) for word in words]
+    word_ends = np.cumsum([len(word) for word in clean_words], dtype=np.int64)
+    return ''.join(clean_words), word_ends
+
+# ------------
+# word index, built once per transcript and shared by every align_timestamp call
+# ------------
+
+_word_index = {"key": None, "index": None}
+
+def _transcript_key(df_words):
+    hashed = pd.util.hash_pandas_object(df_words[['text', 'start', 'end']], index=False)
+    return hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+def _load_word_index(key):
+    if not os.path.exists(_6_WORD_INDEX):
+        return None
+    try:
+        with np.load(_6_WORD_INDEX, allow_pickle=False) as data:
+            if str(data['key']) != key:
+                return None
+            return {"text": str(data['text']), "word_ends": data['word_ends'], "starts": data['starts'], "ends": data['ends']}
+    except (OSError, ValueError, KeyError):
+        return None
+
+def get_word_index(df_words):
+    """Normalized word string, word end offsets and start / end times of the transcript"""
+    key = _transcript_key(df_words)
+    if _word_index["key"] == key:
+        return _word_index["index"]
+    index = _load_word_index(key)
+    if index is None:
+        full_words_str, word_ends = build_word_string(df_words['text'])
+        index = {
+            "text": full_words_str,
+            "word_ends": word_ends,
+            "starts": df_words['start'].to_numpy(dtype=np.float64),
+            "ends": df_words['end'].to_numpy(dtype=np.float64)
+        }
+        os.makedirs(os.path.dirname(_6_WORD_INDEX), exist_ok=True)
+        np.savez(_6_WORD_INDEX, key=np.array(key), text=np.array(full_words_str), **{k: index[k] for k in ("word_ends", "starts", "ends")})
+    _word_index["key"], _word_index["index"] = key, index
+    return index
+
+def fuzzy_find(full_words_str, clean_sentence, current_pos):
+    """Locate a sentence the transcript spells slightly differently, returns (start, end) chars or None"""
+    window = full_words_str[current_pos:current_pos + len(clean_sentence) + FUZZY_WINDOW_CHARS]
+    # anchor on the longest common run, stray matches of a few chars elsewhere in the window do not count
+    anchor = SequenceMatcher(None, window, clean_sentence, autojunk=False).find_longest_match(0, len(window), 0, len(clean_sentence))
+    if anchor.size == 0:
+        return None
+    # only score about one sentence length of text around where the anchor puts the sentence
+    slack = max(2, len(clean_sentence) // 10)
+    lo = max(0, anchor.a - anchor.b - slack)
+    hi = min(len(window), anchor.a - anchor.b + len(clean_sentence) + slack)
+    blocks = [block for block in SequenceMatcher(None, window[lo:hi], clean_sentence, autojunk=False).get_matching_blocks() if block.size > 0]
+    # grow outwards from the longest block, stop at blocks whose offset to their neighbour
+    # differs between text and sentence (stray chars)
+    def detached(left, right):
+        return abs((right.a - left.a) - (right.b - left.b)) > 1
+    first_idx = last_idx = max(range(len(blocks)), key=lambda i: blocks[i].size)
+    while first_idx > 0 and not detached(blocks[first_idx - 1], blocks[first_idx]):
+        first_idx -= 1
+    while last_idx < len(blocks) - 1 and not detached(blocks[last_idx], blocks[last_idx + 1]):
+        last_idx += 1
+    # unmatched chars at the sentence edges (typos) still belong to the span
+    first, last = blocks[first_idx], blocks[last_idx]
+    start = lo + max(first.a - first.b, 0)
+    end = min(hi, lo + last.a + last.size + len(clean_sentence) - last.b - last.size)
+    if end - start > len(clean_sentence) * FUZZY_MAX_SPAN_RATIO:
+        return None
+    if SequenceMatcher(None, window[start:end], clean_sentence, autojunk=False).ratio() < FUZZY_MIN_RATIO:
+        return None
+    return current_pos + start, current_pos + end
+
 def get_sentence_timestamps(df_words, df_sentences):
-    time_stamp_list = []
-    
-    # Build complete string and position mapping
-    full_words_str = ''
-    position_to_word_idx = {}
-    
-    for idx, word in enumerate(df_words['text']):
-        clean_word = remove_punctuation(word.lower())
-        start_pos = len(full_words_str)
-        full_words_str += clean_word
-        for pos in range(start_pos, len(full_words_str)):
-            position_to_word_idx[pos] = idx
-    
+    word_index = get_word_index(df_words)
+    full_words_str, word_ends = word_index["text"], word_index["word_ends"]
+
+    # char spans of every sentence, found left to right in the word string
+    span_starts, span_ends = [], []
     current_pos = 0
     for idx, sentence in df_sentences['Source'].items():
         clean_sentence = remove_punctuation(sentence.lower()).replace(" ", "")
-        sentence_len = len(clean_sentence)
-        
-        match_found = False
-        while current_pos <= len(full_words_str) - sentence_len:
-            if full_words_str[current_pos:current_pos+sentence_len] == clean_sentence:
-                start_word_idx = position_to_word_idx[current_pos]
-                end_word_idx = position_to_word_idx[current_pos + sentence_len - 1]
-                
-                time_stamp_list.append((
-                    float(df_words['start'][start_word_idx]),
-                    float(df_words['end'][end_word_idx])
-                ))
-                
-                current_pos += sentence_len
-                match_found = True
-                break
-            current_pos += 1
-            
-        if not match_found:
-            print(f"\n⚠️ Warning: No exact match found for sentence: {sentence}")
-            show_difference(clean_sentence, 
-                          full_words_str[current_pos:current_pos+len(clean_sentence)])
-            print("\nOriginal sentence:", df_sentences['Source'][idx])
-            raise ValueError("❎ No match found for sentence.")
-    
-    return time_stamp_list
+        match_pos = full_words_str.find(clean_sentence, current_pos)
+        if match_pos >= 0:
+            span = (match_pos, match_pos + len(clean_sentence))
+        else:
+            span = fuzzy_find(full_words_str, clean_sentence, current_pos) if clean_sentence else None
+            if span is None:
+                print(f"\n⚠️ Warning: No exact match found for sentence: {sentence}")
+                show_difference(clean_sentence, 
+                              full_words_str[current_pos:current_pos+len(clean_sentence)])
+                print("\nOriginal sentence:", df_sentences['Source'][idx])
+                raise ValueError("❎ No match found for sentence.")
+            console.print(f"[yellow]⚠️ Fuzzy matched sentence: {sentence}[/yellow]")
+        span_starts.append(span[0])
+        span_ends.append(max(span[1] - 1, span[0]))
+        current_pos = span[1]
+
+    # char -> word: the first word whose end offset lies past the char
+    start_word_idx = np.searchsorted(word_ends, span_starts, side='right')
+    end_word_idx = np.searchsorted(word_ends, span_ends, side='right')
+    starts = word_index["starts"][start_word_idx]
+    ends = word_index["ends"][end_word_idx]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def write_subtitle_files(df, subtitle_output_configs, output_dir):
+    """Render every configured SRT file in a single pass over the lines"""
+    texts = {column: [text.strip() for text in df[column]] for _, columns in subtitle_output_configs for column in columns}
+    outputs = [[] for _ in subtitle_output_configs]
+    for i, timestamp in enumerate(df['timestamp']):
+        for parts, (_, columns) in zip(outputs, subtitle_output_configs):
+            second = texts[columns[1]][i] if len(columns) > 1 else ''
+            parts.append(f"{i+1}\n{timestamp}\n{texts[columns[0]][i]}\n{second}\n\n")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for parts, (filename, _) in zip(outputs, subtitle_output_configs):
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(''.join(parts).strip())
 
 def align_timestamp(df_text, df_translate, subtitle_output_configs: list, output_dir: str, for_display: bool = True):
     """Align timestamps and add a new timestamp column to df_translate"""
     df_trans_time = df_translate.copy()
 
-    # Assign an ID to each word in df_text['text'] and create a new DataFrame
-    words = df_text['text'].str.split(expand=True).stack().reset_index(level=1, drop=True).reset_index()
-    words.columns = ['id', 'word']
-    words['id'] = words['id'].astype(int)
-
     # Process timestamps ⏰
-    time_stamp_list = get_sentence_timestamps(df_text, df_translate)
-    df_trans_time['timestamp'] = time_stamp_list
-    df_trans_time['duration'] = df_trans_time['timestamp'].apply(lambda x: x[1] - x[0])
+    timestamps = np.asarray(get_sentence_timestamps(df_text, df_translate), dtype=np.float64).reshape(-1, 2)
+    starts, ends = timestamps[:, 0], timestamps[:, 1].copy()
+    durations = ends - starts
 
-    # Remove gaps 🕳️
-    for i in range(len(df_trans_time)-1):
-        delta_time = df_trans_time.loc[i+1, 'timestamp'][0] - df_trans_time.loc[i, 'timestamp'][1]
-        if 0 < delta_time < 1:
-            df_trans_time.at[i, 'timestamp'] = (df_trans_time.loc[i, 'timestamp'][0], df_trans_time.loc[i+1, 'timestamp'][0])
+    # Remove gaps 🕳️: a line ends where the next one starts if the gap is shorter than 1s
+    delta_time = starts[1:] - ends[:-1]
+    fill = (delta_time > 0) & (delta_time < 1)
+    ends[:-1][fill] = starts[1:][fill]
 
     # Convert start and end timestamps to SRT format
-    df_trans_time['timestamp'] = df_trans_time['timestamp'].apply(lambda x: convert_to_srt_format(x[0], x[1]))
+    df_trans_time['timestamp'] = convert_to_srt_format(starts, ends)
+    df_trans_time['duration'] = durations
 
     # Polish subtitles: replace punctuation in Translation if for_display
     if for_display:
-        df_trans_time['Translation'] = df_trans_time['Translation'].apply(lambda x: re.sub(r'[，。]', ' ', x).strip())
+        df_trans_time['Translation'] = df_trans_time['Translation'].str.replace(r'[，。]', ' ', regex=True).str.strip()
 
     # Output subtitles 📜
-    def generate_subtitle_string(df, columns):
-        return ''.join([f"{i+1}\n{row['timestamp']}\n{row[columns[0]].strip()}\n{row[columns[1]].strip() if len(columns) > 1 else ''}\n\n" for i, row in df.iterrows()]).strip()
-
     if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-        for filename, columns in subtitle_output_configs:
-            subtitle_str = generate_subtitle_string(df_trans_time, columns)
-            with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
-                f.write(subtitle_str)
+        write_subtitle_files(df_trans_time, subtitle_output_configs, output_dir)
     
     return df_trans_time
 
@@ -148,16 +226,16 @@ def clean_translation(x):
     return autocorrect.format(cleaned)
 
 def align_timestamp_main():
-    df_text = pd.read_excel(_2_CLEANED_CHUNKS)
+    df_text = load_artifact(_2_CLEANED_CHUNKS)
     df_text['text'] = df_text['text'].str.strip('"').str.strip()
-    df_translate = pd.read_excel(_5_SPLIT_SUB)
+    df_translate = load_artifact(_5_SPLIT_SUB)
     df_translate['Translation'] = df_translate['Translation'].apply(clean_translation)
     
     align_timestamp(df_text, df_translate, SUBTITLE_OUTPUT_CONFIGS, _OUTPUT_DIR)
     console.print(Panel("[bold green]🎉📝 Subtitles generation completed! Please check in the `output` folder 👀[/bold green]"))
 
     # for audio
-    df_translate_for_audio = pd.read_excel(_5_REMERGED) # use remerged file to avoid unmatched lines when dubbing
+    df_translate_for_audio = load_artifact(_5_REMERGED) # use remerged file to avoid unmatched lines when dubbing
     df_translate_for_audio['Translation'] = df_translate_for_audio['Translation'].apply(clean_translation)
     
     align_timestamp(df_text, df_translate_for_audio, AUDIO_SUBTITLE_OUTPUT_CONFIGS, _AUDIO_DIR)
@@ -121,7 +121,26 @@ def create_capcut_draft(video_file, TARGET_WIDTH, TARGET_HEIGHT):
     
     return draft_id
 
-def merge_subtitles_to_video():
+def get_scale_pad_filter(width, height):
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+    )
+
+def get_src_trans_subtitle_filter():
+    return (
+        f"subtitles={SRC_SRT}:force_style='FontSize={SRC_FONT_SIZE},FontName={FONT_NAME}," 
+        f"PrimaryColour={SRC_FONT_COLOR},OutlineColour={SRC_OUTLINE_COLOR},OutlineWidth={SRC_OUTLINE_WIDTH},"
+        f"ShadowColour={SRC_SHADOW_COLOR},BorderStyle=1',"
+        f"subtitles={TRANS_SRT}:force_style='FontSize={TRANS_FONT_SIZE},FontName={TRANS_FONT_NAME},"
+        f"PrimaryColour={TRANS_FONT_COLOR},OutlineColour={TRANS_OUTLINE_COLOR},OutlineWidth={TRANS_OUTLINE_WIDTH},"
+        f"BackColour={TRANS_BACK_COLOR},Alignment=2,MarginV=27,BorderStyle=4'"
+    )
+
+def merge_subtitles_to_video(render=True, capcut=True):
+    """Burn subtitles into the video, with render=False only the CapCut draft / placeholder is made and
+    the subtitled video is left to the single-pass render in _12_dub_to_vid.
+    capcut=False skips the draft, for a re-render after the draft was already made"""
     video_file = find_video_files()
     os.makedirs(os.path.dirname(OUTPUT_VIDEO), exist_ok=True)
 
@@ -131,7 +150,7 @@ def merge_subtitles_to_video():
     video.release()
 
     # 创建剪映草稿
-    if load_key("capcut.enable_export"):
+    if capcut and load_key("capcut.enable_export"):
         create_capcut_draft(video_file, TARGET_WIDTH, TARGET_HEIGHT)
 
     # Check resolution
@@ -152,19 +171,14 @@ def merge_subtitles_to_video():
         rprint("Subtitle files not found in the 'output' directory.")
         exit(1)
 
+    if not render:
+        rprint("[bold yellow]Subtitled video will be rendered together with the dubbed video in one pass.[/bold yellow]")
+        return
+
     rprint(f"[bold green]Video resolution: {TARGET_WIDTH}x{TARGET_HEIGHT}[/bold green]")
     ffmpeg_cmd = [
         'ffmpeg', '-i', video_file,
-        '-vf', (
-            f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,"
-            f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2,"
-            f"subtitles={SRC_SRT}:force_style='FontSize={SRC_FONT_SIZE},FontName={FONT_NAME}," 
-            f"PrimaryColour={SRC_FONT_COLOR},OutlineColour={SRC_OUTLINE_COLOR},OutlineWidth={SRC_OUTLINE_WIDTH},"
-            f"ShadowColour={SRC_SHADOW_COLOR},BorderStyle=1',"
-            f"subtitles={TRANS_SRT}:force_style='FontSize={TRANS_FONT_SIZE},FontName={TRANS_FONT_NAME},"
-            f"PrimaryColour={TRANS_FONT_COLOR},OutlineColour={TRANS_OUTLINE_COLOR},OutlineWidth={TRANS_OUTLINE_WIDTH},"
-            f"BackColour={TRANS_BACK_COLOR},Alignment=2,MarginV=27,BorderStyle=4'"
-        ).encode('utf-8'),
+        '-vf', f"{get_scale_pad_filter(TARGET_WIDTH, TARGET_HEIGHT)},{get_src_trans_subtitle_filter()}".encode('utf-8'),
     ]
 
     ffmpeg_gpu = load_key("ffmpeg_gpu")
@@ -179,14 +193,15 @@ def merge_subtitles_to_video():
 
     try:
         process.wait()
-        if process.returncode == 0:
-            rprint(f"\n✅ Done! Time taken: {time.time() - start_time:.2f} seconds")
-        else:
-            rprint("\n❌ FFmpeg execution error")
     except Exception as e:
         rprint(f"\n❌ Error occurred: {e}")
         if process.poll() is None:
             process.kill()
+        raise
+    if process.returncode != 0:
+        rprint("\n❌ FFmpeg execution error")
+        raise RuntimeError(f"FFmpeg failed to render {OUTPUT_VIDEO} (exit code {process.returncode})")
+    rprint(f"\n✅ Done! Time taken: {time.time() - start_time:.2f} seconds")
 
 if __name__ == "__main__":
     merge_subtitles_to_video()
\ No newline at end of file
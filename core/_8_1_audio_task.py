@@ -7,6 +7,7 @@ from core.prompts import get_subtitle_trim_prompt
 from core.tts_backend.estimate_duration import init_estimator, estimate_duration
 from core.utils import *
 from core.utils.models import *
+from core.utils.artifacts import save_artifact
 
 console = Console()
 speed_factor = load_key("speed_factor")
@@ -136,7 +137,7 @@ def process_srt():
 def gen_audio_task_main():
     df = process_srt()
     console.print(df)
-    df.to_excel(_8_1_AUDIO_TASK, index=False)
+    save_artifact(df, _8_1_AUDIO_TASK)
     rprint(Panel(f"Successfully generated {_8_1_AUDIO_TASK}", title="Success", border_style="green"))
 
 if __name__ == '__main__':
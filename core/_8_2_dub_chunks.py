@@ -1,11 +1,11 @@
 import datetime
 import re
-import pandas as pd
 from core._8_1_audio_task import time_diff_seconds
-from core.asr_backend.audio_preprocess import get_audio_duration
+from core.utils.audio_probe import get_audio_duration
 from core.tts_backend.estimate_duration import init_estimator, estimate_duration
 from core.utils import *
 from core.utils.models import *
+from core.utils.artifacts import load_artifact, save_audio_tasks
 
 SRC_SRT = "output/src.srt"
 TRANS_SRT = "output/trans.srt"
@@ -131,7 +131,7 @@ def process_cutoffs(df):
 
 def gen_dub_chunks():
     rprint("[🎬 Starting] Generating dubbing chunks...")
-    df = pd.read_excel(_8_1_AUDIO_TASK)
+    df = load_artifact(_8_1_AUDIO_TASK)
     
     rprint("[📊 Processing] Analyzing timing and speed...")
     df = analyze_subtitle_timing_and_speed(df)
@@ -199,7 +199,7 @@ def gen_dub_chunks():
             raise ValueError("Matching failed")
 
     # Save results
-    df.to_excel(_8_1_AUDIO_TASK, index=False)
+    save_audio_tasks(df, _8_1_AUDIO_TASK)
     rprint("[✅ Complete] Matching completed successfully!")
 
 if __name__ == "__main__":
@@ -4,12 +4,16 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 from core.utils import *
 from core.utils.models import *
-import pandas as pd
+from core.utils.artifacts import load_artifact
 import soundfile as sf
+from core.utils.pcm_cache import load_pcm
 console = Console()
 from core.asr_backend.demucs_vl import demucs_audio
 from core.utils.models import *
 
+# reference clips are cut from the decoded PCM cache at this sample rate
+REFER_SR = 44100
+
 def time_to_samples(time_str, sr):
     """Unified time conversion function"""
     h, m, s = time_str.split(':')
@@ -33,8 +37,9 @@ def extract_refer_audio_main():
     os.makedirs(_AUDIO_REFERS_DIR, exist_ok=True)
     
     # Read task file and audio data
-    df = pd.read_excel(_8_1_AUDIO_TASK)
-    data, sr = sf.read(_VOCAL_AUDIO_FILE)
+    df = load_artifact(_8_1_AUDIO_TASK)
+    sr = REFER_SR
+    data = load_pcm(_VOCAL_AUDIO_FILE, sr)
     
     with Progress(
         SpinnerColumn(),
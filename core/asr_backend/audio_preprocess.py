@@ -1,20 +1,33 @@
 import os, subprocess
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple
-from pydub import AudioSegment
 from core.utils import *
 from core.utils.models import *
-from pydub import AudioSegment
-from pydub.silence import detect_silence
-from pydub.utils import mediainfo
+from core.utils.artifacts import save_artifact
+from core.utils.pcm_cache import load_pcm
+from core.utils.audio_probe import get_audio_duration
 from rich import print as rprint
 
+def measure_volume_gain(audio_path, target_db = -20.0):
+    """Return (dBFS, gain in dB that brings it to target_db), measured on the shared decoded PCM"""
+    samples = load_pcm(audio_path)
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if len(samples) else 0.0
+    if rms <= 0:
+        return -float('inf'), 0.0
+    dBFS = 20 * np.log10(rms)
+    return dBFS, target_db - dBFS
+
 def normalize_audio_volume(audio_path, output_path, target_db = -20.0, format = "wav"):
-    audio = AudioSegment.from_file(audio_path)
-    change_in_dBFS = target_db - audio.dBFS
-    normalized_audio = audio.apply_gain(change_in_dBFS)
-    normalized_audio.export(output_path, format=format)
-    rprint(f"[green]✅ Audio normalized from {audio.dBFS:.1f}dB to {target_db:.1f}dB[/green]")
+    # measure loudness on the shared decoded PCM, apply the gain with ffmpeg
+    dBFS, change_in_dBFS = measure_volume_gain(audio_path, target_db)
+    tmp_path = f"{os.path.splitext(output_path)[0]}.normalizing.{format}"
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error', '-i', audio_path,
+        '-af', f'volume={change_in_dBFS:.4f}dB', tmp_path
+    ], check=True, stderr=subprocess.PIPE)
+    os.replace(tmp_path, output_path)
+    rprint(f"[green]✅ Audio normalized from {dBFS:.1f}dB to {target_db:.1f}dB[/green]")
     return output_path
 
 def convert_video_to_audio(video_file: str):
@@ -30,27 +43,35 @@ def convert_video_to_audio(video_file: str):
         ], check=True, stderr=subprocess.PIPE)
         rprint(f"[green]🎬➡️🎵 Converted <{video_file}> to <{_RAW_AUDIO_FILE}> with FFmpeg\n[/green]")
 
-def get_audio_duration(audio_file: str) -> float:
-    """Get the duration of an audio file using ffmpeg."""
-    cmd = ['ffmpeg', '-i', audio_file]
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    _, stderr = process.communicate()
-    output = stderr.decode('utf-8', errors='ignore')
-    
-    try:
-        duration_str = [line for line in output.split('\n') if 'Duration' in line][0]
-        duration_parts = duration_str.split('Duration: ')[1].split(',')[0].split(':')
-        duration = float(duration_parts[0])*3600 + float(duration_parts[1])*60 + float(duration_parts[2])
-    except Exception as e:
-        print(f"[red]❌ Error: Failed to get audio duration: {e}[/red]")
-        duration = 0
-    return duration
+# ------------
+# silence detection on windows of the decoded PCM cache
+# ------------
+SILENCE_SR = 16000
+
+def detect_silence_np(samples: np.ndarray, sr: int, min_silence_len: int = 1000, silence_thresh: float = -16) -> List[Tuple[int, int]]:
+    """NumPy port of pydub.silence.detect_silence with a 1ms seek step, returns [(start_ms, end_ms)]"""
+    seg_len = round(len(samples) * 1000 / sr)
+    if seg_len < min_silence_len:
+        return []
+    # rms of every min_silence_len window, one window per millisecond, from a running sum of squares
+    starts_ms = np.arange(0, seg_len - min_silence_len + 1)
+    begin = np.minimum(starts_ms * sr // 1000, len(samples))
+    end = np.minimum((starts_ms + min_silence_len) * sr // 1000, len(samples))
+    squares = np.concatenate(([0.0], np.cumsum(samples.astype(np.float64) ** 2)))
+    rms = np.floor(np.sqrt((squares[end] - squares[begin]) / np.maximum(end - begin, 1)))
+    silent = np.flatnonzero(rms <= 10 ** (silence_thresh / 20) * 32768)
+    if len(silent) == 0:
+        return []
+    # windows closer than min_silence_len belong to the same silent range
+    breaks = np.flatnonzero(np.diff(silent) > min_silence_len)
+    firsts = np.concatenate(([silent[0]], silent[breaks + 1]))
+    lasts = np.concatenate((silent[breaks], [silent[-1]]))
+    return [(int(first), int(last) + min_silence_len) for first, last in zip(firsts, lasts)]
 
 def split_audio(audio_file: str, target_len: float = 30*60, win: float = 60) -> List[Tuple[float, float]]:
-    ## 在 [target_len-win, target_len+win] 区间内用 pydub 检测静默，切分音频
+    ## 在 [target_len-win, target_len+win] 区间内检测静默，切分音频
     rprint(f"[blue]🎙️ Starting audio segmentation {audio_file} {target_len} {win}[/blue]")
-    audio = AudioSegment.from_file(audio_file)
-    duration = float(mediainfo(audio_file)["duration"])
+    duration = get_audio_duration(audio_file)
     if duration <= target_len + win:
         return [(0, duration)]
     segments, pos = [], 0.0
@@ -61,11 +82,13 @@ def split_audio(audio_file: str, target_len: float = 30*60, win: float = 60) ->
             segments.append((pos, duration)); break
 
         threshold = pos + target_len
-        ws, we = int((threshold - win) * 1000), int((threshold + win) * 1000)
+        window_start = threshold - win
+        # pydub measures silence on int16 amplitudes
+        samples = load_pcm(audio_file, SILENCE_SR)[int(window_start * SILENCE_SR):int((threshold + win) * SILENCE_SR)] * 32768
         
         # 获取完整的静默区域
-        silence_regions = detect_silence(audio[ws:we], min_silence_len=int(safe_margin*1000), silence_thresh=-30)
-        silence_regions = [(s/1000 + (threshold - win), e/1000 + (threshold - win)) for s, e in silence_regions]
+        silence_regions = detect_silence_np(samples, SILENCE_SR, min_silence_len=int(safe_margin*1000), silence_thresh=-30)
+        silence_regions = [(s/1000 + window_start, e/1000 + window_start) for s, e in silence_regions]
         # 筛选长度足够（至少1秒）且位置适合的静默区域
         valid_regions = [
             (start, end) for start, end in silence_regions 
@@ -152,8 +175,8 @@ def save_results(df: pd.DataFrame):
         df = df[df['text'].str.len() <= 30]
     
     df['text'] = df['text'].apply(lambda x: f'"{x}"')
-    df.to_excel(_2_CLEANED_CHUNKS, index=False)
-    rprint(f"[green]📊 Excel file saved to {_2_CLEANED_CHUNKS}[/green]")
+    save_artifact(df, _2_CLEANED_CHUNKS)
+    rprint(f"[green]📊 Word table saved to {_2_CLEANED_CHUNKS}[/green]")
 
 def save_language(language: str):
     update_key("whisper.detected_language", language)
\ No newline at end of file
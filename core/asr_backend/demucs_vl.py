@@ -1,4 +1,5 @@
 import os
+import sys
 import torch
 from rich.console import Console
 from rich import print as rprint
@@ -19,6 +20,13 @@ class PreloadedSeparator(Separator):
         self.update_parameter(device=device, shifts=shifts, overlap=overlap, split=split,
                             segment=segment, jobs=jobs, progress=True, callback=None, callback_arg=None)
 
+def make_room_for_demucs():
+    # WhisperX models kept from an earlier video may compete with demucs for GPU memory,
+    # only look them up when the local runtime was imported, importing whisperx is slow
+    whisperx_local = sys.modules.get("core.asr_backend.whisperX_local")
+    if whisperx_local is not None:
+        whisperx_local.make_room_on_gpu()
+
 def demucs_audio():
     if os.path.exists(_VOCAL_AUDIO_FILE) and os.path.exists(_BACKGROUND_AUDIO_FILE):
         rprint(f"[yellow]⚠️ {_VOCAL_AUDIO_FILE} and {_BACKGROUND_AUDIO_FILE} already exist, skip Demucs processing.[/yellow]")
@@ -27,6 +35,7 @@ def demucs_audio():
     console = Console()
     os.makedirs(_AUDIO_DIR, exist_ok=True)
     
+    make_room_for_demucs()
     console.print("🤖 Loading <htdemucs> model...")
     model = get_model('htdemucs')
     separator = PreloadedSeparator(model=model, shifts=1, overlap=0.25)
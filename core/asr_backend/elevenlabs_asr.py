@@ -3,10 +3,10 @@ import json
 import time
 import requests
 import tempfile
-import librosa
 import soundfile as sf
 from rich import print as rprint
 from core.utils import *
+from core.utils.pcm_cache import load_pcm, DEFAULT_SR
 
 # ----------------------------------------
 # ISO 639-2 to 1
@@ -72,7 +72,7 @@ def transcribe_audio_elevenlabs(raw_audio_path, vocal_audio_path, start = None,
             return json.load(f)
     
     # Load audio and process start/end parameters
-    y, sr = librosa.load(vocal_audio_path, sr=16000)
+    y, sr = load_pcm(vocal_audio_path), DEFAULT_SR
     audio_duration = len(y) / sr
     
     if start is None or end is None:
@@ -3,11 +3,11 @@ import io
 import json
 import time
 import requests
-import librosa
 import soundfile as sf
 from rich import print as rprint
 from core.utils import *
 from core.utils.models import *
+from core.utils.pcm_cache import load_pcm, DEFAULT_SR
 
 OUTPUT_LOG_DIR = "output/log"
 def transcribe_audio_302(raw_audio_path: str, vocal_audio_path: str, start: float = None, end: float = None):
@@ -21,7 +21,7 @@ def transcribe_audio_302(raw_audio_path: str, vocal_audio_path: str, start: floa
     update_key("whisper.language", WHISPER_LANGUAGE)
     url = "https://api.302.ai/302/whisperx"
     
-    y, sr = librosa.load(vocal_audio_path, sr=16000)
+    y, sr = load_pcm(vocal_audio_path), DEFAULT_SR
     audio_duration = len(y) / sr
     
     if start is None or end is None:
@@ -1,12 +1,14 @@
 import os
+import gc
 import warnings
 import time
 import subprocess
 import torch
 import whisperx
-import librosa
+from collections import OrderedDict
 from rich import print as rprint
 from core.utils import *
+from core.utils.pcm_cache import load_pcm_segment
 
 warnings.filterwarnings("ignore")
 MODEL_DIR = load_key("model_dir")
@@ -35,9 +37,85 @@ def check_hf_mirror():
     rprint(f"[cyan]🚀 Selected mirror:[/cyan] {fastest_url} ({best_time:.2f}s)")
     return fastest_url
 
+# ------------
+# resident models, reused across segments and batch videos
+# released under GPU memory pressure (also checked before demucs runs in the same process),
+# or after every ASR step with whisper.keep_models_loaded = false
+# ------------
+_asr_model = {"key": None, "model": None}
+_align_models = OrderedDict()
+_hf_endpoint = {"url": None}
+
+def _free_cuda_cache(device):
+    gc.collect()
+    if device == "cuda":
+        torch.cuda.empty_cache()
+
+def _free_gpu_gb():
+    free, _ = torch.cuda.mem_get_info()
+    return free / (1024**3)
+
+def _evict_for_memory(device):
+    if device != "cuda":
+        return
+    # evict cached models before loading another one when less GPU memory than this is free
+    min_free_gb = load_key("whisper.min_free_gpu_gb")
+    while _free_gpu_gb() < min_free_gb and (_align_models or _asr_model["model"] is not None):
+        if _align_models:
+            key, _ = _align_models.popitem(last=False)
+            rprint(f"[yellow]♻️ Low GPU memory, releasing align model: {key[0]}[/yellow]")
+        else:
+            rprint("[yellow]♻️ Low GPU memory, releasing WHISPER model[/yellow]")
+            _asr_model.update(key=None, model=None)
+        _free_cuda_cache(device)
+
+def get_asr_model(model_name, device, compute_type):
+    key = (model_name, device, compute_type)
+    if _asr_model["key"] == key:
+        return _asr_model["model"]
+    # only one ASR model is kept, drop the old one before loading the new one
+    if _asr_model["model"] is not None:
+        _asr_model.update(key=None, model=None)
+        _free_cuda_cache(device)
+    _evict_for_memory(device)
+
+    vad_options = {"vad_onset": 0.500,"vad_offset": 0.363}
+    asr_options = {"temperatures": [0],"initial_prompt": "",}
+    rprint("[bold yellow] You can ignore warning of `Model was trained with torch 1.10.0+cu102, yours is 2.0.0+cu118...`[/bold yellow]")
+    # language is passed per transcribe call so that the same model serves every video
+    model = whisperx.load_model(model_name, device, compute_type=compute_type, language=None, vad_options=vad_options, asr_options=asr_options, download_root=MODEL_DIR)
+    _asr_model.update(key=key, model=model)
+    return model
+
+def get_align_model(language, device):
+    key = (language, device)
+    if key in _align_models:
+        _align_models.move_to_end(key)
+        return _align_models[key]
+    max_align_models = max(1, load_key("whisper.max_align_models"))
+    while len(_align_models) >= max_align_models:
+        _align_models.popitem(last=False)
+    _free_cuda_cache(device)
+    _evict_for_memory(device)
+    _align_models[key] = whisperx.load_align_model(language_code=language, device=device)
+    return _align_models[key]
+
+def make_room_on_gpu():
+    """Release cached models until `whisper.min_free_gpu_gb` is free, for another GPU stage of this process"""
+    if torch.cuda.is_available():
+        _evict_for_memory("cuda")
+
+def release_models():
+    """Drop every resident WhisperX model, e.g. before handing the GPU to demucs"""
+    _asr_model.update(key=None, model=None)
+    _align_models.clear()
+    _free_cuda_cache("cuda" if torch.cuda.is_available() else "cpu")
+
 @except_handler("WhisperX processing error:")
 def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
-    os.environ['HF_ENDPOINT'] = check_hf_mirror()
+    if _hf_endpoint["url"] is None:
+        _hf_endpoint["url"] = check_hf_mirror() or "https://huggingface.co"
+    os.environ['HF_ENDPOINT'] = _hf_endpoint["url"]
     WHISPER_LANGUAGE = load_key("whisper.language")
     device = "cuda" if torch.cuda.is_available() else "cpu"
     rprint(f"🚀 Starting WhisperX using device: {device} ...")
@@ -66,31 +144,22 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
     else:
         rprint(f"[green]📥 Using WHISPER model from HuggingFace:[/green] {model_name} ...")
 
-    vad_options = {"vad_onset": 0.500,"vad_offset": 0.363}
-    asr_options = {"temperatures": [0],"initial_prompt": "",}
     whisper_language = None if 'auto' in WHISPER_LANGUAGE else WHISPER_LANGUAGE
-    rprint("[bold yellow] You can ignore warning of `Model was trained with torch 1.10.0+cu102, yours is 2.0.0+cu118...`[/bold yellow]")
-    model = whisperx.load_model(model_name, device, compute_type=compute_type, language=whisper_language, vad_options=vad_options, asr_options=asr_options, download_root=MODEL_DIR)
+    model = get_asr_model(model_name, device, compute_type)
 
-    def load_audio_segment(audio_file, start, end):
-        audio, _ = librosa.load(audio_file, sr=16000, offset=start, duration=end - start, mono=True)
-        return audio
-    raw_audio_segment = load_audio_segment(raw_audio_file, start, end)
-    vocal_audio_segment = load_audio_segment(vocal_audio_file, start, end)
+    # 16k mono slices of the shared decoded PCM cache
+    raw_audio_segment = load_pcm_segment(raw_audio_file, start, end)
+    vocal_audio_segment = load_pcm_segment(vocal_audio_file, start, end)
     
     # -------------------------
     # 1. transcribe raw audio
     # -------------------------
     transcribe_start_time = time.time()
     rprint("[bold green]Note: You will see Progress if working correctly ↓[/bold green]")
-    result = model.transcribe(raw_audio_segment, batch_size=batch_size, print_progress=True)
+    result = model.transcribe(raw_audio_segment, batch_size=batch_size, language=whisper_language, print_progress=True)
     transcribe_time = time.time() - transcribe_start_time
     rprint(f"[cyan]⏱️ time transcribe:[/cyan] {transcribe_time:.2f}s")
 
-    # Free GPU resources
-    del model
-    torch.cuda.empty_cache()
-
     # Save language
     update_key("whisper.language", result['language'])
     if result['language'] == 'zh' and WHISPER_LANGUAGE != 'zh':
@@ -101,15 +170,11 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
     # -------------------------
     align_start_time = time.time()
     # Align timestamps using vocal audio
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
+    model_a, metadata = get_align_model(result["language"], device)
     result = whisperx.align(result["segments"], model_a, metadata, vocal_audio_segment, device, return_char_alignments=False)
     align_time = time.time() - align_start_time
     rprint(f"[cyan]⏱️ time align:[/cyan] {align_time:.2f}s")
 
-    # Free GPU resources again
-    torch.cuda.empty_cache()
-    del model_a
-
     # Adjust timestamps
     for segment in result['segments']:
         segment['start'] += start
@@ -48,6 +48,39 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
     "split": "Complete sentence with [br] tags at split positions"
 }}"""
 
+def get_batch_split_prompt(items, word_limit = 20):
+    """items: list of (id, sentence, num_parts)"""
+    language = load_key("whisper.detected_language")
+    sentences = '\n'.join(f'<sentence id="{i}" parts="{num_parts}">{sentence}</sentence>' for i, sentence, num_parts in items)
+    json_format = json.dumps({str(i): {"split": f"sentence {i} with [br] tags at {num_parts - 1} split position(s)"} for i, _, num_parts in items}, indent=2, ensure_ascii=False)
+    batch_split_prompt = f"""
+## Role
+You are a professional Netflix subtitle splitter in **{language}**.
+
+## Task
+Split each given subtitle text into the number of parts given by its `parts` attribute, each part less than **{word_limit}** words.
+
+1. Maintain sentence meaning coherence according to Netflix subtitle standards
+2. MOST IMPORTANT: Keep parts roughly equal in length (minimum 3 words each)
+3. Split at natural points like punctuation marks or conjunctions
+4. If provided text is repeated words, simply split at the middle of the repeated words.
+5. Do not change, add or remove any words, only insert [br] tags
+6. Handle every sentence independently and answer for every id
+
+## Given Texts
+<split_these_sentences>
+{sentences}
+</split_these_sentences>
+
+## Output in only JSON format and no other text
+```json
+{json_format}
+```
+
+Note: Start you answer with ```json and end with ```, do not add any other text.
+""".strip()
+    return batch_split_prompt
+
 ## ================================================================
 # @ step4_1_summarize.py
 def get_summary_prompt(source_content, custom_terms_json=None):
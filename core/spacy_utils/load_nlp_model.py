@@ -1,33 +1,89 @@
+import threading
+from collections import OrderedDict
 import spacy
 from spacy.cli import download
 from core.utils import rprint, load_key, except_handler
 
 SPACY_MODEL_MAP = load_key("spacy_model_map")
 
+# --------------------
+# process-wide model registry
+# loaded pipelines stay warm across stages and batch videos, keyed by (language, model, disabled pipes)
+# --------------------
+MAX_CACHED_MODELS = 2
+# every trainable / rule pipe shipped in the *_md models, excluded for the tokenizer-only variant
+ALL_PIPES = ("tok2vec", "morphologizer", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner")
+TOKENIZER_ONLY = ("*",)
+
+_models = OrderedDict()
+_models_lock = threading.Lock()
+
 def get_spacy_model(language: str):
     model = SPACY_MODEL_MAP.get(language.lower(), "en_core_web_md")
     if language not in SPACY_MODEL_MAP:
         rprint(f"[yellow]Spacy model does not support '{language}', using en_core_web_md model as fallback...[/yellow]")
     return model
 
-@except_handler("Failed to load NLP Spacy model")
-def init_nlp():
-    language = "en" if load_key("whisper.language") == "en" else load_key("whisper.detected_language")
-    model = get_spacy_model(language)
+def _get_language():
+    return "en" if load_key("whisper.language") == "en" else load_key("whisper.detected_language")
+
+def _load_model(model, disable):
+    kwargs = {"exclude": list(ALL_PIPES)} if disable == TOKENIZER_ONLY else {"disable": list(disable)}
     rprint(f"[blue]⏳ Loading NLP Spacy model: <{model}> ...[/blue]")
     try:
-        nlp = spacy.load(model)
+        nlp = spacy.load(model, **kwargs)
     except:
         rprint(f"[yellow]Downloading {model} model...[/yellow]")
         rprint("[yellow]If download failed, please check your network and try again.[/yellow]")
         download(model)
-        nlp = spacy.load(model)
+        nlp = spacy.load(model, **kwargs)
     rprint("[green]✅ NLP Spacy model loaded successfully![/green]")
     return nlp
 
+def _get_cached(language, model, disable):
+    key = (language, model, disable)
+    with _models_lock:
+        nlp = _models.get(key)
+        if nlp is not None:
+            _models.move_to_end(key)
+            return nlp
+
+    nlp = _load_model(model, disable)
+    with _models_lock:
+        _models[key] = nlp
+        _models.move_to_end(key)
+        while len(_models) > MAX_CACHED_MODELS:
+            _models.popitem(last=False)
+    return nlp
+
+@except_handler("Failed to load NLP Spacy model")
+def init_nlp(disable=()):
+    language = _get_language()
+    return _get_cached(language, get_spacy_model(language), tuple(sorted(disable)))
+
+@except_handler("Failed to load NLP Spacy tokenizer")
+def init_tokenizer():
+    """Pipeline whose `tokenizer` is all that callers use, e.g. for token counts"""
+    language = _get_language()
+    model = get_spacy_model(language)
+    # any warm pipeline of the same model shares the same tokenizer
+    with _models_lock:
+        for (cached_language, cached_model, _), nlp in reversed(_models.items()):
+            if (cached_language, cached_model) == (language, model):
+                return nlp
+    return _get_cached(language, model, TOKENIZER_ONLY)
+
+def release_nlp_models():
+    with _models_lock:
+        _models.clear()
+
 # --------------------
-# define the intermediate files
+# batched parsing
 # --------------------
-SPLIT_BY_COMMA_FILE = "output/log/split_by_comma.txt"
-SPLIT_BY_CONNECTOR_FILE = "output/log/split_by_connector.txt"
-SPLIT_BY_MARK_FILE = "output/log/split_by_mark.txt"
+# pipes whose annotations none of the splitters read
+UNUSED_PIPES = ("ner", "lemmatizer")
+
+def pipe_texts(nlp, texts):
+    cfg = load_key("spacy_pipe")
+    disable = [name for name in UNUSED_PIPES if name in nlp.pipe_names]
+    return nlp.pipe(texts, batch_size=cfg["batch_size"], n_process=max(1, cfg["n_process"]), disable=disable)
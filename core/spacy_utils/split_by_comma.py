@@ -1,8 +1,8 @@
 import itertools
-import os
 import warnings
 from core.utils import *
-from core.spacy_utils.load_nlp_model import init_nlp, SPLIT_BY_COMMA_FILE, SPLIT_BY_MARK_FILE
+from core.spacy_utils.load_nlp_model import init_nlp
+from core.spacy_utils.split_by_mark import split_by_mark
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -12,9 +12,9 @@ def is_valid_phrase(phrase):
     has_verb = any((token.pos_ == "VERB" or token.pos_ == 'AUX') for token in phrase)
     return (has_subject and has_verb)
 
-def analyze_comma(start, doc, token):
+def analyze_comma(start, end, doc, token):
     left_phrase = doc[max(start, token.i - 9):token.i]
-    right_phrase = doc[token.i + 1:min(len(doc), token.i + 10)]
+    right_phrase = doc[token.i + 1:min(end, token.i + 10)]
     
     suitable_for_splitting = is_valid_phrase(right_phrase) # and is_valid_phrase(left_phrase) # ! no need to chekc left phrase
     
@@ -27,45 +27,35 @@ def analyze_comma(start, doc, token):
 
     return suitable_for_splitting
 
-def split_by_comma(text, nlp):
-    doc = nlp(text)
+def split_by_comma(span):
+    doc = span.doc
     sentences = []
-    start = 0
+    start = span.start
     
-    for i, token in enumerate(doc):
+    for token in span:
         if token.text == "," or token.text == "，":
-            suitable_for_splitting = analyze_comma(start, doc, token)
+            suitable_for_splitting = analyze_comma(start, span.end, doc, token)
             
             if suitable_for_splitting:
-                sentences.append(doc[start:token.i].text.strip())
-                rprint(f"[yellow]✂️  Split at comma: {doc[start:token.i][-4:]},| {doc[token.i + 1:][:4]}[/yellow]")
+                sentences.append(doc[start:token.i])
+                rprint(f"[yellow]✂️  Split at comma: {doc[start:token.i][-4:]},| {doc[token.i + 1:span.end][:4]}[/yellow]")
                 start = token.i + 1
     
-    sentences.append(doc[start:].text.strip())
+    sentences.append(doc[start:span.end])
     return sentences
 
-def split_by_comma_main(nlp):
-
-    with open(SPLIT_BY_MARK_FILE, "r", encoding="utf-8") as input_file:
-        sentences = input_file.readlines()
-
+def split_by_comma_main(spans):
     all_split_sentences = []
-    for sentence in sentences:
-        split_sentences = split_by_comma(sentence.strip(), nlp)
-        all_split_sentences.extend(split_sentences)
+    for span in spans:
+        all_split_sentences.extend(split_by_comma(span))
 
-    with open(SPLIT_BY_COMMA_FILE, "w", encoding="utf-8") as output_file:
-        for sentence in all_split_sentences:
-            output_file.write(sentence + "\n")
-    
-    # delete the original file
-    os.remove(SPLIT_BY_MARK_FILE)
-    
-    rprint(f"[green]💾 Sentences split by commas saved to →  `{SPLIT_BY_COMMA_FILE}`[/green]")
+    rprint(f"[green]✂️  Sentences split by commas: {len(all_split_sentences)}[/green]")
+    return all_split_sentences
 
 if __name__ == "__main__":
     nlp = init_nlp()
-    split_by_comma_main(nlp)
+    for span in split_by_comma_main(split_by_mark(nlp)):
+        print(span.text.strip())
     # nlp = init_nlp()
     # test = "So in the same frame, right there, almost in the exact same spot on the ice, Brown has committed himself, whereas McDavid has not."
-    # print(split_by_comma(test, nlp))
\ No newline at end of file
+    # print(split_by_comma(nlp(test)[:]))
@@ -1,63 +1,64 @@
-import os
-import pandas as pd
 import warnings
-from core.spacy_utils.load_nlp_model import init_nlp, SPLIT_BY_MARK_FILE
+from spacy.tokens import Doc
+from core.spacy_utils.load_nlp_model import init_nlp, pipe_texts
 from core.utils.config_utils import load_key, get_joiner
+from core.utils.artifacts import load_artifact
+from core.utils.models import _2_CLEANED_CHUNKS
 from rich import print as rprint
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+# the transcript is parsed in pieces of roughly this many characters, cut after sentence-final words
+PIPE_CHUNK_CHARS = 2000
+SENTENCE_END_MARKS = ('.', '?', '!', '。', '？', '！', '…')
+
+def chunk_words(words, joiner):
+    pieces, current, size = [], [], 0
+    for word in words:
+        current.append(word)
+        size += len(word) + len(joiner)
+        # force a cut on transcripts without punctuation to keep every piece parseable
+        if (size >= PIPE_CHUNK_CHARS and word.rstrip().endswith(SENTENCE_END_MARKS)) or size >= PIPE_CHUNK_CHARS * 10:
+            pieces.append(joiner.join(current))
+            current, size = [], 0
+    if current:
+        pieces.append(joiner.join(current))
+    return pieces
+
 def split_by_mark(nlp):
     whisper_language = load_key("whisper.language")
     language = load_key("whisper.detected_language") if whisper_language == 'auto' else whisper_language # consider force english case
     joiner = get_joiner(language)
     rprint(f"[blue]🔍 Using {language} language joiner: '{joiner}'[/blue]")
-    chunks = pd.read_excel("output/log/cleaned_chunks.xlsx")
+    chunks = load_artifact(_2_CLEANED_CHUNKS)
     chunks.text = chunks.text.apply(lambda x: x.strip('"').strip(""))
     
-    # join with joiner
-    input_text = joiner.join(chunks.text.to_list())
-
-    doc = nlp(input_text)
+    # parse pieces with nlp.pipe, then stitch them back into one doc joined with joiner
+    pieces = chunk_words(chunks.text.to_list(), joiner)
+    doc = Doc.from_docs(list(pipe_texts(nlp, pieces)), ensure_whitespace=bool(joiner))
     assert doc.has_annotation("SENT_START")
 
-    # skip - and ...
-    sentences_by_mark = []
-    current_sentence = []
-    
-    # iterate all sentences
+    # skip - and ..., keep the merged sentences as spans of the single parsed doc
+    spans_by_mark = []
     for sent in doc.sents:
         text = sent.text.strip()
-        
-        # check if the current sentence ends with - or ...
-        if current_sentence and (
-            text.startswith('-') or 
-            text.startswith('...') or
-            current_sentence[-1].endswith('-') or
-            current_sentence[-1].endswith('...')
-        ):
-            current_sentence.append(text)
-        else:
-            if current_sentence:
-                sentences_by_mark.append(' '.join(current_sentence))
-                current_sentence = []
-            current_sentence.append(text)
-    
-    # add the last sentence
-    if current_sentence:
-        sentences_by_mark.append(' '.join(current_sentence))
+        if not text:
+            continue
+        if spans_by_mark:
+            prev_text = spans_by_mark[-1].text.strip()
+            # check if the current sentence continues the previous one with - or ...
+            continued = text.startswith('-') or text.startswith('...') or prev_text.endswith('-') or prev_text.endswith('...')
+            # ! If the current line contains only punctuation, merge it with the previous line, this happens in Chinese, Japanese, etc.
+            punct_only = text in [',', '.', '，', '。', '？', '！']
+            if continued or punct_only:
+                spans_by_mark[-1] = doc[spans_by_mark[-1].start:sent.end]
+                continue
+        spans_by_mark.append(sent)
 
-    with open(SPLIT_BY_MARK_FILE, "w", encoding="utf-8") as output_file:
-        for i, sentence in enumerate(sentences_by_mark):
-            if i > 0 and sentence.strip() in [',', '.', '，', '。', '？', '！']:
-                # ! If the current line contains only punctuation, merge it with the previous line, this happens in Chinese, Japanese, etc.
-                output_file.seek(output_file.tell() - 1, os.SEEK_SET)  # Move to the end of the previous line
-                output_file.write(sentence)  # Add the punctuation
-            else:
-                output_file.write(sentence + "\n")
-    
-    rprint(f"[green]💾 Sentences split by punctuation marks saved to →  `{SPLIT_BY_MARK_FILE}`[/green]")
+    rprint(f"[green]✂️  Sentences split by punctuation marks: {len(spans_by_mark)}[/green]")
+    return spans_by_mark
 
 if __name__ == "__main__":
     nlp = init_nlp()
-    split_by_mark(nlp)
+    for span in split_by_mark(nlp):
+        print(span.text.strip())
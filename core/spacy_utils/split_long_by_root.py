@@ -1,15 +1,16 @@
-import os
 import string
 import warnings
-from core.spacy_utils.load_nlp_model import init_nlp, SPLIT_BY_CONNECTOR_FILE
+from core.spacy_utils.load_nlp_model import init_nlp
+from core.spacy_utils.split_by_mark import split_by_mark
+from core.spacy_utils.split_by_comma import split_by_comma_main
+from core.spacy_utils.split_by_connector import split_sentences_main
 from core.utils import *
 from core.utils.models import _3_1_SPLIT_BY_NLP
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-def split_long_sentence(doc):
-    tokens = [token.text for token in doc]
-    n = len(tokens)
+def split_long_sentence(span):
+    n = len(span)
     
     # dynamic programming array, dp[i] represents the optimal split scheme from the start to the ith token
     dp = [float('inf')] * (n + 1)
@@ -21,7 +22,7 @@ def split_long_sentence(doc):
     for i in range(1, n + 1):
         for j in range(max(0, i - 100), i):  # limit search range to avoid overly long sentences
             if i - j >= 30:  # ensure sentence length is at least 30
-                token = doc[i-1]
+                token = span[i-1]
                 if j == 0 or (token.is_sent_end or token.pos_ in ['VERB', 'AUX'] or token.dep_ == 'ROOT'):
                     if dp[j] + 1 < dp[i]:
                         dp[i] = dp[j] + 1
@@ -30,75 +31,65 @@ def split_long_sentence(doc):
     # rebuild sentences based on optimal split points
     sentences = []
     i = n
-    whisper_language = load_key("whisper.language")
-    language = load_key("whisper.detected_language") if whisper_language == 'auto' else whisper_language # consider force english case
-    joiner = get_joiner(language)
     while i > 0:
         j = prev[i]
-        sentences.append(joiner.join(tokens[j:i]).strip())
+        sentences.append(span[j:i])
         i = j
     
     return sentences[::-1]  # reverse list to keep original order
 
-def split_extremely_long_sentence(doc):
-    tokens = [token.text for token in doc]
-    n = len(tokens)
+def split_extremely_long_sentence(span):
+    n = len(span)
     
     num_parts = (n + 59) // 60  # round up
     
     part_length = n // num_parts
     
     sentences = []
-    whisper_language = load_key("whisper.language")
-    language = load_key("whisper.detected_language") if whisper_language == 'auto' else whisper_language # consider force english case
-    joiner = get_joiner(language)
     for i in range(num_parts):
         start = i * part_length
         end = start + part_length if i < num_parts - 1 else n
-        sentence = joiner.join(tokens[start:end])
-        sentences.append(sentence)
+        sentences.append(span[start:end])
     
     return sentences
 
 
-def split_long_by_root_main(nlp):
-    with open(SPLIT_BY_CONNECTOR_FILE, "r", encoding="utf-8") as input_file:
-        sentences = input_file.readlines()
-
+def split_long_by_root_main(spans):
     all_split_sentences = []
-    for sentence in sentences:
-        doc = nlp(sentence.strip())
-        if len(doc) > 60:
-            split_sentences = split_long_sentence(doc)
-            if any(len(nlp(sent)) > 60 for sent in split_sentences):
-                split_sentences = [subsent for sent in split_sentences for subsent in split_extremely_long_sentence(nlp(sent))]
+    for span in spans:
+        if len(span) > 60:
+            split_sentences = split_long_sentence(span)
+            if any(len(sent) > 60 for sent in split_sentences):
+                split_sentences = [subsent for sent in split_sentences for subsent in split_extremely_long_sentence(sent)]
             all_split_sentences.extend(split_sentences)
-            rprint(f"[yellow]✂️  Splitting long sentences by root: {sentence[:30]}...[/yellow]")
+            rprint(f"[yellow]✂️  Splitting long sentences by root: {span.text[:30]}...[/yellow]")
         else:
-            all_split_sentences.append(sentence.strip())
+            all_split_sentences.append(span)
 
     punctuation = string.punctuation + "'" + '"'  # include all punctuation and apostrophe ' and "
 
+    # only the final result is written to disk
+    lines = []
+    for i, span in enumerate(all_split_sentences):
+        sentence = span.text.strip()
+        if not sentence or all(char in punctuation for char in sentence):
+            rprint(f"[yellow]⚠️  Warning: Empty or punctuation-only line detected at index {i}[/yellow]")
+            if lines:
+                lines[-1] += sentence
+            continue
+        lines.append(sentence)
+
     with open(_3_1_SPLIT_BY_NLP, "w", encoding="utf-8") as output_file:
-        for i, sentence in enumerate(all_split_sentences):
-            stripped_sentence = sentence.strip()
-            if not stripped_sentence or all(char in punctuation for char in stripped_sentence):
-                rprint(f"[yellow]⚠️  Warning: Empty or punctuation-only line detected at index {i}[/yellow]")
-                if i > 0:
-                    all_split_sentences[i-1] += sentence
-                continue
+        for sentence in lines:
             output_file.write(sentence + "\n")
 
-    # delete the original file
-    os.remove(SPLIT_BY_CONNECTOR_FILE)   
-
     rprint(f"[green]💾 Long sentences split by root saved to →  {_3_1_SPLIT_BY_NLP}[/green]")
 
 if __name__ == "__main__":
     nlp = init_nlp()
-    split_long_by_root_main(nlp)
+    split_long_by_root_main(split_sentences_main(split_by_comma_main(split_by_mark(nlp))))
     # raw = "平口さんの盛り上げごまが初めて売れました本当に嬉しいです本当にやっぱり見た瞬間いいって言ってくれるそういうコマを作るのがやっぱりいいですよねその2ヶ月後チコさんが何やらそわそわしていましたなんか気持ち悪いやってきたのは平口さんの駒の評判を聞きつけた愛知県の収集家ですこの男性師匠大沢さんの駒も持っているといいますちょっと褒めすぎかなでも確実にファンは広がっているようです自信がない部分をすごく感じてたのでこれで自信を持って進んでくれるなっていう本当に始まったばっかりこれからいろいろ挑戦していってくれるといいなと思って今月平口さんはある場所を訪れましたこれまで数々のタイトル戦でコマを提供してきた老舗5番手平口さんのコマを扱いたいと言いますいいですねぇ困ってだんだん成長しますので大切に使ってそういう長く良い駒になる駒ですね商談が終わった後店主があるものを取り出しましたこの前の名人戦で使った駒があるんですけど去年、名人銭で使われた盛り上げごま低く盛り上げて品良くするというのは難しい素晴らしいですね平口さんが目指す高みですこういった感じで作れればまだまだですけどただ、多分、咲く。"
     # nlp = init_nlp()
     # doc = nlp(raw.strip())
-    # for sent in split_still_long_sentence(doc):
-    #     print(sent, '\n==========')
+    # for sent in split_long_sentence(doc[:]):
+    #     print(sent.text, '\n==========')
@@ -2,6 +2,7 @@ import streamlit as st
 from translations.translations import translate as t
 from translations.translations import DISPLAY_LANGUAGES
 from core.utils import *
+from core.utils.llm_scheduler import PRIORITY_HIGH
 import requests
 
 def config_input(label, key, help=None):
@@ -544,7 +545,7 @@ def page_setting():
 def check_api():
     try:
         resp = ask_gpt("This is a test, response 'message':'success' in json format.", 
-                      resp_type="json", log_title='None')
+                      resp_type="json", log_title='None', priority=PRIORITY_HIGH, use_cache=False)
         return resp.get('message') == 'success'
     except Exception:
         return False
@@ -4,9 +4,15 @@ from rich.console import Console
 from rich.table import Table
 from rich import box
 from core.utils import *
+from core.utils.gpt_cache import export_gpt_log
+from core.utils.llm_scheduler import PRIORITY_BULK, DEFAULT_PRIORITY
 console = Console()
 
 def valid_translate_result(result: dict, required_keys: list, required_sub_keys: list):
+    # Check that every line came back, and nothing more (rejected answers are logged to gpt_log/error.json)
+    if len(result) != len(required_keys):
+        return {"status": "error", "message": f"Expected {len(required_keys)} translated lines, got {len(result)}"}
+
     # Check for the required key
     if not all(key in result for key in required_keys):
         return {"status": "error", "message": f"Missing required key(s): {', '.join(set(required_keys) - set(result.keys()))}"}
@@ -18,25 +24,33 @@ def valid_translate_result(result: dict, required_keys: list, required_sub_keys:
 
     return {"status": "success", "message": "Translation completed"}
 
+def valid_partial_translate_result(result, required_keys):
+    """Checked on the partially streamed json, only rejects answers that can no longer become valid"""
+    if not isinstance(result, dict):
+        return {"status": "error", "message": "Response is not a json object"}
+    unexpected_keys = set(result.keys()) - set(required_keys)
+    if unexpected_keys:
+        return {"status": "error", "message": f"Unexpected key(s): {', '.join(sorted(unexpected_keys))}"}
+    return {"status": "success", "message": ""}
+
 def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_to_note_prompt, summary_prompt, index = 0):
     shared_prompt = generate_shared_prompt(previous_content_prompt, after_cotent_prompt, summary_prompt, things_to_note_prompt)
 
-    # Retry translation if the length of the original text and the translated text are not the same, or if the specified key is missing
+    # The validators reject a wrong line count or a missing key before the answer is cached,
+    # so a rejected answer is never served again and ask_gpt simply asks again
     def retry_translation(prompt, length, step_name):
-        def valid_faith(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['direct'])
-        def valid_express(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['free'])
-        for retry in range(3):
-            if step_name == 'faithfulness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_faith, log_title=f'translate_{step_name}')
-            elif step_name == 'expressiveness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_express, log_title=f'translate_{step_name}')
-            if len(lines.split('\n')) == len(result):
-                return result
-            if retry != 2:
-                console.print(f'[yellow]⚠️ {step_name.capitalize()} translation of block {index} failed, Retry...[/yellow]')
-        raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed after 3 retries. Please check `output/gpt_log/error.json` for more details.[/red]')
+        required_keys = [str(i) for i in range(1, length+1)]
+        sub_key = 'direct' if step_name == 'faithfulness' else 'free'
+        # a block that has its faithful pass goes ahead of new blocks, so blocks finish in a steady stream
+        priority = PRIORITY_BULK if step_name == 'faithfulness' else DEFAULT_PRIORITY
+        def valid_result(response_data):
+            return valid_translate_result(response_data, required_keys, [sub_key])
+        def valid_partial(response_data):
+            return valid_partial_translate_result(response_data, required_keys)
+        try:
+            return ask_gpt(prompt, resp_type='json', valid_def=valid_result, log_title=f'translate_{step_name}', priority=priority, partial_valid_def=valid_partial)
+        except Exception as e:
+            raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed: {e}. Please check `output/gpt_log/error.json` for more details.[/red]') from e
 
     ## Step 1: Faithful to the Original Text
     prompt1 = get_prompt_faithfulness(lines, shared_prompt)
@@ -80,6 +94,7 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
     translate_result = "\n".join([express_result[i]["free"].replace('\n', ' ').strip() for i in express_result])
 
     if len(lines.split('\n')) != len(translate_result.split('\n')):
+        export_gpt_log('translate_expressiveness')
         console.print(Panel(f'[red]❌ Translation of block {index} failed, Length Mismatch, Please check `output/gpt_log/translate_expressiveness.json`[/red]'))
         raise ValueError(f'Origin ···{lines}···,\nbut got ···{translate_result}···')
 
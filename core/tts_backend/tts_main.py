@@ -2,7 +2,7 @@ import os
 import re
 from pydub import AudioSegment
 
-from core.asr_backend.audio_preprocess import get_audio_duration
+from core.utils.audio_probe import get_audio_duration
 from core.tts_backend.gpt_sovits_tts import gpt_sovits_tts_for_videolingo
 from core.tts_backend.sf_fishtts import siliconflow_fish_tts_for_videolingo
 from core.tts_backend.openai_tts import openai_tts
@@ -2,9 +2,9 @@
 try:
     from .ask_gpt import ask_gpt
     from .decorator import except_handler, check_file_exists
-    from .config_utils import load_key, update_key, get_joiner
+    from .config_utils import load_key, update_key, update_keys, get_joiner
     from rich import print as rprint
 except ImportError:
     pass
 
-__all__ = ["ask_gpt", "except_handler", "check_file_exists", "load_key", "update_key", "rprint", "get_joiner"]
\ No newline at end of file
+__all__ = ["ask_gpt", "except_handler", "check_file_exists", "load_key", "update_key", "update_keys", "rprint", "get_joiner"]
\ No newline at end of file
@@ -0,0 +1,147 @@
+import os
+import ast
+import numpy as np
+import pandas as pd
+from rich import print as rprint
+from core.utils.config_utils import load_key
+
+# ------------
+# intermediate dataframe artifacts handed from one stage to the next
+# parquet / feather keep list columns native, xlsx is only for manual editing
+# ------------
+
+ARTIFACT_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather", "xlsx": ".xlsx"}
+
+def _get_artifact_ext():
+    try:
+        artifact_format = load_key("artifact_format")
+    except (KeyError, FileNotFoundError):
+        artifact_format = "parquet"
+    if artifact_format not in ARTIFACT_EXTENSIONS:
+        raise ValueError(f"Unsupported artifact format: {artifact_format}, choose from {list(ARTIFACT_EXTENSIONS)}")
+    return ARTIFACT_EXTENSIONS[artifact_format]
+
+ARTIFACT_EXT = _get_artifact_ext()
+
+def excel_sibling(path):
+    return os.path.splitext(path)[0] + ".xlsx"
+
+def save_artifact(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    ext = os.path.splitext(path)[1]
+    if ext == ".parquet":
+        df.to_parquet(path, index=False)
+    elif ext == ".feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        _excel_ready(df).to_excel(path, index=False)
+
+def load_artifact(path):
+    """Load an artifact, a newer .xlsx next to it (edited by hand) takes precedence"""
+    xlsx = excel_sibling(path)
+    if xlsx != path and os.path.exists(xlsx) and (not os.path.exists(path) or os.path.getmtime(xlsx) > os.path.getmtime(path)):
+        rprint(f"[yellow]📝 Using manually edited {xlsx}[/yellow]")
+        return pd.read_excel(xlsx)
+    ext = os.path.splitext(path)[1]
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".feather":
+        return pd.read_feather(path)
+    return pd.read_excel(path)
+
+def _to_python(value):
+    if isinstance(value, np.ndarray):
+        return [_to_python(v) for v in value.tolist()] if value.dtype == object else value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_to_python(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_python(v) for k, v in value.items()}
+    return value
+
+def _excel_ready(df):
+    # nested cells are written as python literals, which is what the loaders parse back
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = [repr(_to_python(v)) if isinstance(v, (np.ndarray, list, tuple, dict)) else v for v in df[column]]
+    return df
+
+def export_to_excel(path):
+    """Write an .xlsx copy of an artifact for manual editing, edit it and the next load picks it up"""
+    xlsx = excel_sibling(path)
+    if xlsx == path:
+        return xlsx
+    _excel_ready(load_artifact(path)).to_excel(xlsx, index=False)
+    # same mtime as the artifact, so only a later edit makes the copy win
+    mtime = os.path.getmtime(path)
+    os.utime(xlsx, (mtime, mtime))
+    return xlsx
+
+# ------------
+# audio task table: typed list columns
+# lines / src_lines are list<string>, new_sub_times is list<struct<start, end>>
+# ------------
+
+TEXT_LIST_COLUMNS = ("lines", "src_lines")
+TIMES_COLUMN = "new_sub_times"
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+def _parse_cell(value):
+    # xlsx (hand edited or legacy) keeps lists as their repr, literal_eval never runs code
+    return ast.literal_eval(value) if isinstance(value, str) else value
+
+def _text_list(value):
+    value = _parse_cell(value)
+    return None if _is_missing(value) else [str(v) for v in value]
+
+def _times_array(value):
+    """-> float64 array of shape (n, 2) with start / end seconds"""
+    value = _parse_cell(value)
+    if _is_missing(value):
+        return None
+    pairs = [(v["start"], v["end"]) if isinstance(v, dict) else tuple(v) for v in value]
+    return np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+
+def save_audio_tasks(df, path):
+    if os.path.splitext(path)[1] == ".xlsx":
+        return save_artifact(df, path)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+
+    columns = {}
+    for column in TEXT_LIST_COLUMNS:
+        if column in df.columns:
+            columns[column] = pa.array([_text_list(v) for v in df[column]], type=pa.list_(pa.string()))
+    if TIMES_COLUMN in df.columns:
+        times = [_times_array(v) for v in df[TIMES_COLUMN]]
+        columns[TIMES_COLUMN] = pa.array(
+            [None if t is None else [{"start": start, "end": end} for start, end in t.tolist()] for t in times],
+            type=pa.list_(pa.struct([("start", pa.float64()), ("end", pa.float64())]))
+        )
+    table = pa.Table.from_pandas(df.drop(columns=list(columns)), preserve_index=False)
+    for column in df.columns:
+        if column in columns:
+            table = table.add_column(list(df.columns).index(column), column, columns[column])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if path.endswith(".parquet"):
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path)
+
+def load_audio_tasks(path):
+    """Load the audio task table with `lines` as lists of str and `new_sub_times` as (n, 2) arrays"""
+    df = load_artifact(path)
+    for column in TEXT_LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.Series([_text_list(v) for v in df[column]], index=df.index, dtype=object)
+    if TIMES_COLUMN in df.columns:
+        df[TIMES_COLUMN] = pd.Series([_times_array(v) for v in df[TIMES_COLUMN]], index=df.index, dtype=object)
+    return df
+
+if __name__ == "__main__":
+    from core.utils.models import _4_2_TRANSLATION
+    print(export_to_excel(_4_2_TRANSLATION))
@@ -1,63 +1,160 @@
-import os
-import json
-from threading import Lock
+import threading
+from types import SimpleNamespace
+import httpx
 import json_repair
 from openai import OpenAI
 from core.utils.config_utils import load_key
 from rich import print as rprint
 from core.utils.decorator import except_handler
+from core.utils.llm_scheduler import get_scheduler, estimate_tokens, DEFAULT_PRIORITY
+from core.utils.gpt_cache import save_cache as _save_cache, load_cache as _load_cache, export_gpt_log, load_global_cache, save_global_cache
 
 # ------------
-# cache gpt response
+# pooled openai clients, one per (base_url, key), shared by all threads
 # ------------
 
-LOCK = Lock()
-GPT_LOG_FOLDER = 'output/gpt_log'
-
-def _save_cache(model, prompt, resp_content, resp_type, resp, message=None, log_title="default"):
-    with LOCK:
-        logs = []
-        file = os.path.join(GPT_LOG_FOLDER, f"{log_title}.json")
-        os.makedirs(os.path.dirname(file), exist_ok=True)
-        if os.path.exists(file):
-            with open(file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        logs.append({"model": model, "prompt": prompt, "resp_content": resp_content, "resp_type": resp_type, "resp": resp, "message": message})
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=4)
-
-def _load_cache(prompt, resp_type, log_title):
-    with LOCK:
-        file = os.path.join(GPT_LOG_FOLDER, f"{log_title}.json")
-        if os.path.exists(file):
-            with open(file, 'r', encoding='utf-8') as f:
-                for item in json.load(f):
-                    if item["prompt"] == prompt and item["resp_type"] == resp_type:
-                        return item["resp"]
-        return False
+_CLIENTS = {}
+_CLIENT_LOCK = threading.Lock()
+
+def _resolve_base_url(base_url):
+    if 'ark' in base_url:
+        return "https://ark.cn-beijing.volces.com/api/v3" # huoshan base url
+    elif 'v1' not in base_url:
+        return base_url.strip('/') + '/v1'
+    return base_url
+
+def get_client(base_url, api_key):
+    with _CLIENT_LOCK:
+        client = _CLIENTS.get((base_url, api_key))
+        if client is None:
+            pool = load_key("llm_pool")
+            limits = httpx.Limits(
+                max_connections=pool["max_connections"],
+                max_keepalive_connections=pool["max_keepalive"],
+                keepalive_expiry=pool["keepalive_expiry"]
+            )
+            http_client = httpx.Client(limits=limits, timeout=httpx.Timeout(300, connect=10))
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+            _CLIENTS[(base_url, api_key)] = client
+        return client
+
+def close_clients():
+    with _CLIENT_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+# ------------
+# completion (blocking or streamed with early abort)
+# ------------
+
+# a partial answer is re-parsed only once it grew by this many chars and by a quarter of the last
+# parsed length, so all the parses of one stream together stay linear in its length
+PARTIAL_CHECK_MIN_CHARS = 200
+
+class TopLevelScanner:
+    """Tracks json nesting over the streamed text, in O(1) per char, and reports where
+    the last complete top-level member ends, only then is the partial answer worth parsing"""
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.length = 0
+
+    def feed(self, delta):
+        boundary = -1
+        for i, char in enumerate(delta):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    boundary = self.length + i + 1
+            elif char == ',' and self.depth == 1:
+                # members before the comma are complete, the comma itself is left out
+                boundary = self.length + i
+        self.length += len(delta)
+        return boundary
+
+class StreamAborted(ValueError):
+    def __init__(self, message, content):
+        super().__init__(message)
+        self.content = content
+
+def _complete(client, params):
+    resp_raw = client.chat.completions.create(**params)
+    return SimpleNamespace(content=resp_raw.choices[0].message.content, usage=resp_raw.usage)
+
+def _stream_complete(client, params, partial_valid_def):
+    stream = client.chat.completions.create(stream=True, **params)
+    parts = []
+    scanner = TopLevelScanner()
+    checked = 0
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ''
+            parts.append(delta)
+            # only re-parse when a top-level member has just been completed,
+            # and cut right after it so a half-streamed key or value is never validated
+            boundary = scanner.feed(delta)
+            if partial_valid_def and boundary - checked >= max(PARTIAL_CHECK_MIN_CHARS, checked // 4):
+                checked = boundary
+                partial = json_repair.loads(''.join(parts)[:boundary])
+                if isinstance(partial, (dict, list)) and partial:
+                    valid_resp = partial_valid_def(partial)
+                    if valid_resp['status'] != 'success':
+                        raise StreamAborted(valid_resp['message'], ''.join(parts))
+    finally:
+        stream.close()
+    return SimpleNamespace(content=''.join(parts), usage=None)
 
 # ------------
 # ask gpt once
 # ------------
 
+def _accepts(valid_def, resp):
+    # cached answers go through the current validator too, a stricter check must not be bypassed by the cache
+    if not valid_def:
+        return True
+    try:
+        return valid_def(resp)['status'] == 'success'
+    except Exception:
+        return False
+
 @except_handler("GPT request failed", retry=5)
-def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default"):
-    if not load_key("api.key"):
+def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default", priority=DEFAULT_PRIORITY, partial_valid_def=None, use_cache=True):
+    """With use_cache=False the request always reaches the API and its answer is not cached, e.g. for connection checks"""
+    api = load_key("api")
+    if not api["key"]:
         raise ValueError("API key is not set")
+    model = api["model"]
+    base_url = _resolve_base_url(api["base_url"])
     # check cache
-    cached = _load_cache(prompt, resp_type, log_title)
-    if cached:
-        rprint("use cache response")
-        return cached
+    if use_cache:
+        cached = _load_cache(model, prompt, resp_type, log_title, accept=lambda resp: _accepts(valid_def, resp))
+        if cached:
+            rprint("use cache response")
+            return cached
+        cached = load_global_cache(base_url, model, prompt, resp_type)
+        if cached and _accepts(valid_def, cached):
+            rprint("use global cache response")
+            _save_cache(model, prompt, None, resp_type, cached, log_title=log_title, message="global cache")
+            return cached
 
-    model = load_key("api.model")
-    base_url = load_key("api.base_url")
-    if 'ark' in base_url:
-        base_url = "https://ark.cn-beijing.volces.com/api/v3" # huoshan base url
-    elif 'v1' not in base_url:
-        base_url = base_url.strip('/') + '/v1'
-    client = OpenAI(api_key=load_key("api.key"), base_url=base_url)
-    response_format = {"type": "json_object"} if resp_type == "json" and load_key("api.llm_support_json") else None
+    # 429s are retried by the scheduler with Retry-After, not inside the client
+    client = get_client(base_url, api["key"]).with_options(max_retries=0)
+    response_format = {"type": "json_object"} if resp_type == "json" and api["llm_support_json"] else None
 
     messages = [{"role": "user", "content": prompt}]
 
@@ -67,10 +164,20 @@ def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default"):
         response_format=response_format,
         timeout=300
     )
-    resp_raw = client.chat.completions.create(**params)
+    scheduler = get_scheduler()
+    if api["stream"] and resp_type == "json":
+        # abort as soon as the partial json is clearly invalid, the retry of ask_gpt asks again
+        try:
+            completion = scheduler.submit(lambda: _stream_complete(client, params, partial_valid_def), est_tokens=estimate_tokens(prompt), priority=priority)
+        except StreamAborted as e:
+            _save_cache(model, prompt, e.content, resp_type, None, log_title="error", message=f"stream aborted: {e}")
+            export_gpt_log("error")
+            raise
+    else:
+        completion = scheduler.submit(lambda: _complete(client, params), est_tokens=estimate_tokens(prompt), priority=priority)
 
     # process and return full result
-    resp_content = resp_raw.choices[0].message.content
+    resp_content = completion.content
     if resp_type == "json":
         resp = json_repair.loads(resp_content)
     else:
@@ -81,9 +188,12 @@ def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default"):
         valid_resp = valid_def(resp)
         if valid_resp['status'] != 'success':
             _save_cache(model, prompt, resp_content, resp_type, resp, log_title="error", message=valid_resp['message'])
+            export_gpt_log("error")
             raise ValueError(f"❎ API response error: {valid_resp['message']}")
 
-    _save_cache(model, prompt, resp_content, resp_type, resp, log_title=log_title)
+    if use_cache:
+        _save_cache(model, prompt, resp_content, resp_type, resp, log_title=log_title)
+        save_global_cache(base_url, model, prompt, resp_type, resp)
     return resp
 
 
@@ -0,0 +1,90 @@
+import os
+import json
+import struct
+import threading
+import subprocess
+from rich import print as rprint
+
+# ------------
+# audio metadata service
+# wav headers are parsed directly, other formats go through one ffprobe call,
+# results are memoized by (path, mtime, size)
+# ------------
+
+_lock = threading.Lock()
+_probe_cache = {}
+
+def _read_wav_header(path):
+    """Return (duration, sample_rate, channels) from a RIFF/WAVE header, None if it cannot be trusted"""
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                _, channels, sample_rate, byte_rate, _, _ = fmt
+                if byte_rate == 0:
+                    return None
+                # writers that stream to a pipe leave the size at 0 / 0xFFFFFFFF
+                data_size = min(chunk_size, file_size - f.tell())
+                if chunk_size in (0, 0xFFFFFFFF):
+                    data_size = file_size - f.tell()
+                return data_size / byte_rate, sample_rate, channels
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+def _ffprobe(path):
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration:stream=sample_rate,channels', '-of', 'json', path]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    info = json.loads(result.stdout.decode('utf-8', errors='ignore'))
+    stream = info.get('streams', [{}])[0] if info.get('streams') else {}
+    return float(info['format']['duration']), int(stream.get('sample_rate', 0)), int(stream.get('channels', 0))
+
+def _ffmpeg_duration(path):
+    # last resort for hosts without ffprobe, scrape `ffmpeg -i`
+    result = subprocess.run(['ffmpeg', '-i', path], capture_output=True)
+    output = result.stderr.decode('utf-8', errors='ignore')
+    duration_str = [line for line in output.split('\n') if 'Duration' in line][0]
+    h, m, s = duration_str.split('Duration: ')[1].split(',')[0].split(':')
+    return float(h)*3600 + float(m)*60 + float(s), 0, 0
+
+def get_audio_info(audio_file):
+    """Return {"duration", "sample_rate", "channels"} of an audio file"""
+    st = os.stat(audio_file)
+    key = (os.path.abspath(audio_file), st.st_mtime_ns, st.st_size)
+    with _lock:
+        if key in _probe_cache:
+            return dict(_probe_cache[key])
+
+    probed = None
+    if audio_file.lower().endswith('.wav'):
+        probed = _read_wav_header(audio_file)
+    if probed is None:
+        try:
+            probed = _ffprobe(audio_file)
+        except (OSError, subprocess.CalledProcessError, KeyError, ValueError, IndexError):
+            probed = _ffmpeg_duration(audio_file)
+
+    info = dict(zip(("duration", "sample_rate", "channels"), probed))
+    with _lock:
+        _probe_cache[key] = info
+    return dict(info)
+
+def get_audio_duration(audio_file: str) -> float:
+    """Get the duration of an audio file in seconds, 0 if it cannot be probed."""
+    try:
+        return get_audio_info(audio_file)["duration"]
+    except Exception as e:
+        rprint(f"[red]❌ Error: Failed to get audio duration: {e}[/red]")
+        return 0
@@ -1,4 +1,6 @@
 from ruamel.yaml import YAML
+import copy
+import os
 import threading
 
 CONFIG_PATH = 'config.yaml'
@@ -8,44 +10,84 @@ yaml = YAML()
 yaml.preserve_quotes = True
 
 # -----------------------
-# load & update config
+# in-process config snapshot
 # -----------------------
 
-def load_key(key):
+# parsed config is kept in memory and only re-parsed when the file on disk changes
+_snapshot = {"stat": None, "data": None}
+
+def _file_stat():
+    st = os.stat(CONFIG_PATH)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+def _to_plain(value):
+    if isinstance(value, dict):
+        return {str(k): _to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, str):
+        return str(value)
+    return value
+
+def _refresh_snapshot(data, stat):
+    _snapshot["data"] = _to_plain(data)
+    _snapshot["stat"] = stat
+
+def _get_snapshot():
     with lock:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
-            data = yaml.load(file)
+        stat = _file_stat()
+        if _snapshot["stat"] != stat:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
+                data = yaml.load(file)
+            _refresh_snapshot(data, stat)
+        return _snapshot["data"]
+
+# -----------------------
+# load & update config
+# -----------------------
 
+def load_key(key):
     keys = key.split('.')
-    value = data
+    value = _get_snapshot()
     for k in keys:
         if isinstance(value, dict) and k in value:
             value = value[k]
         else:
             raise KeyError(f"Key '{k}' not found in configuration")
-    return value
+    # callers may mutate dicts / lists, never hand out the cached objects
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
 
-def update_key(key, new_value):
+def _set_in_data(data, key, new_value):
+    keys = key.split('.')
+    current = data
+    for k in keys[:-1]:
+        if isinstance(current, dict) and k in current:
+            current = current[k]
+        else:
+            return False
+
+    if isinstance(current, dict) and keys[-1] in current:
+        current[keys[-1]] = new_value
+        return True
+    else:
+        raise KeyError(f"Key '{keys[-1]}' not found in configuration")
+
+def update_keys(updates):
+    """Apply several `key: value` updates and write config.yaml only once"""
     with lock:
         with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
             data = yaml.load(file)
 
-        keys = key.split('.')
-        current = data
-        for k in keys[:-1]:
-            if isinstance(current, dict) and k in current:
-                current = current[k]
-            else:
-                return False
-
-        if isinstance(current, dict) and keys[-1] in current:
-            current[keys[-1]] = new_value
+        results = {key: _set_in_data(data, key, new_value) for key, new_value in updates.items()}
+        if any(results.values()):
             with open(CONFIG_PATH, 'w', encoding='utf-8') as file:
                 yaml.dump(data, file)
-            return True
-        else:
-            raise KeyError(f"Key '{keys[-1]}' not found in configuration")
-        
+        _refresh_snapshot(data, _file_stat())
+        return results
+
+def update_key(key, new_value):
+    return update_keys({key: new_value})[key]
+
 # basic utils
 def get_joiner(language):
     if language in load_key('language_split_with_space'):
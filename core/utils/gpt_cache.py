@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from core.utils.config_utils import load_key
+
+# ------------
+# content-addressed gpt response cache (sqlite, one connection per thread)
+# ------------
+
+GPT_LOG_FOLDER = 'output/gpt_log'
+GPT_CACHE_DB = os.path.join(GPT_LOG_FOLDER, 'cache.db')
+
+_local = threading.local()
+# every open connection of every thread, so cleanup() can close the ones opened by worker threads too
+_open_conns = set()
+_open_conns_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gpt_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cache_key TEXT NOT NULL,
+    log_title TEXT NOT NULL,
+    model TEXT,
+    prompt TEXT,
+    resp_content TEXT,
+    resp_type TEXT,
+    resp TEXT,
+    message TEXT,
+    created_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_gpt_log_key ON gpt_log (log_title, cache_key);
+"""
+
+def cache_key(model, prompt, resp_type):
+    raw = json.dumps([model, prompt, resp_type], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _connect(db_path, schema=_SCHEMA):
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    # the connection may have been closed by close_connections(), or the db moved away by cleanup()
+    if conn is not None:
+        with _open_conns_lock:
+            closed = conn not in _open_conns
+        if closed or not os.path.exists(db_path):
+            _close(conn)
+            conn = None
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # only this thread uses it, but close_connections() may close it from another one
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(schema)
+        conns[db_path] = conn
+        with _open_conns_lock:
+            _open_conns.add(conn)
+    return conn
+
+def _close(conn):
+    with _open_conns_lock:
+        _open_conns.discard(conn)
+    conn.close()
+
+def save_cache(model, prompt, resp_content, resp_type, resp, message=None, log_title="default"):
+    conn = _connect(GPT_CACHE_DB)
+    conn.execute(
+        "INSERT INTO gpt_log (cache_key, log_title, model, prompt, resp_content, resp_type, resp, message, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (cache_key(model, prompt, resp_type), log_title, model, prompt, resp_content, resp_type,
+         json.dumps(resp, ensure_ascii=False), message, time.time())
+    )
+
+def load_cache(model, prompt, resp_type, log_title, accept=None):
+    """Newest cached answer that `accept(resp)` takes, so an answer stored before a stricter check is skipped"""
+    if not os.path.exists(GPT_CACHE_DB):
+        return False
+    conn = _connect(GPT_CACHE_DB)
+    rows = conn.execute(
+        "SELECT resp FROM gpt_log WHERE log_title = ? AND cache_key = ? ORDER BY id DESC",
+        (log_title, cache_key(model, prompt, resp_type))
+    )
+    for (resp_json,) in rows:
+        resp = json.loads(resp_json)
+        if resp and (accept is None or accept(resp)):
+            return resp
+    return False
+
+# ------------
+# global cache shared across videos, lives outside `output/` so cleanup() keeps it
+# ------------
+
+_GLOBAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT,
+    resp_type TEXT,
+    resp TEXT,
+    size INTEGER,
+    last_access REAL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access);
+"""
+EVICT_CHECK_INTERVAL = 64
+_write_count = 0
+_write_lock = threading.Lock()
+
+def _global_key(base_url, model, prompt, resp_type):
+    # the same model name behind another endpoint may answer differently, or not at all
+    return cache_key(f"{base_url}|{model}", prompt, resp_type)
+
+def _global_db():
+    cache_dir = load_key("llm_cache.dir")
+    if not cache_dir or load_key("llm_cache.max_size_mb") <= 0:
+        return None
+    return os.path.join(os.path.expanduser(cache_dir), 'llm_cache.db')
+
+def load_global_cache(base_url, model, prompt, resp_type):
+    db_path = _global_db()
+    if db_path is None or not os.path.exists(db_path):
+        return False
+    conn = _connect(db_path, _GLOBAL_SCHEMA)
+    key = _global_key(base_url, model, prompt, resp_type)
+    row = conn.execute("SELECT resp FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+    if not row:
+        return False
+    conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+    return json.loads(row[0])
+
+def save_global_cache(base_url, model, prompt, resp_type, resp):
+    global _write_count
+    db_path = _global_db()
+    if db_path is None:
+        return
+    conn = _connect(db_path, _GLOBAL_SCHEMA)
+    resp_json = json.dumps(resp, ensure_ascii=False)
+    conn.execute(
+        "INSERT OR REPLACE INTO llm_cache (cache_key, model, resp_type, resp, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+        (_global_key(base_url, model, prompt, resp_type), model, resp_type, resp_json, len(resp_json.encode('utf-8')), time.time())
+    )
+    with _write_lock:
+        _write_count += 1
+        check = _write_count % EVICT_CHECK_INTERVAL == 1
+    if check:
+        evict_global_cache()
+
+def evict_global_cache():
+    """Drop least recently used entries until the cache fits in `llm_cache.max_size_mb`"""
+    db_path = _global_db()
+    if db_path is None or not os.path.exists(db_path):
+        return 0
+    conn = _connect(db_path, _GLOBAL_SCHEMA)
+    max_size = load_key("llm_cache.max_size_mb") * 1024 * 1024
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    if total <= max_size:
+        return 0
+    # evict down to 90% so that we do not trigger again on the next write
+    to_free = total - int(max_size * 0.9)
+    freed, keys = 0, []
+    for key, size in conn.execute("SELECT cache_key, size FROM llm_cache ORDER BY last_access"):
+        keys.append((key,))
+        freed += size
+        if freed >= to_free:
+            break
+    conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", keys)
+    return len(keys)
+
+# ------------
+# human-readable export
+# ------------
+
+def export_gpt_log(log_title=None):
+    """Dump cached responses to `output/gpt_log/<log_title>.json` in the legacy list format"""
+    if not os.path.exists(GPT_CACHE_DB):
+        return []
+    conn = _connect(GPT_CACHE_DB)
+    if log_title is None:
+        titles = [row[0] for row in conn.execute("SELECT DISTINCT log_title FROM gpt_log")]
+    else:
+        titles = [log_title]
+
+    files = []
+    for title in titles:
+        rows = conn.execute(
+            "SELECT model, prompt, resp_content, resp_type, resp, message FROM gpt_log WHERE log_title = ? ORDER BY id",
+            (title,)
+        ).fetchall()
+        logs = [{"model": model, "prompt": prompt, "resp_content": resp_content, "resp_type": resp_type,
+                 "resp": json.loads(resp), "message": message}
+                for model, prompt, resp_content, resp_type, resp, message in rows]
+        file = os.path.join(GPT_LOG_FOLDER, f"{title}.json")
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(logs, f, ensure_ascii=False, indent=4)
+        files.append(file)
+    return files
+
+def close_connections():
+    """Close the connections of every thread, e.g. before moving `output/` away, threads reconnect on next use"""
+    with _open_conns_lock:
+        conns = list(_open_conns)
+        _open_conns.clear()
+    for conn in conns:
+        conn.close()
+    _local.conns = {}
+
+if __name__ == '__main__':
+    print(export_gpt_log())
@@ -0,0 +1,174 @@
+import time
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+from email.utils import parsedate_to_datetime
+from rich import print as rprint
+from core.utils.config_utils import load_key
+
+# ------------------------------
+# global LLM scheduler
+# one asyncio loop in a background thread coordinates every ask_gpt call
+# (translate, split, align, trim ...) against shared concurrency, rpm and tpm limits
+# ------------------------------
+
+MAX_RATE_LIMIT_RETRIES = 8
+# lower runs first: short calls that gate a stage go ahead of the bulk per-line requests
+PRIORITY_HIGH = 1
+DEFAULT_PRIORITY = 5
+PRIORITY_BULK = 8
+
+class TokenBucket:
+    """Refills `per_minute` units every minute, a limit of 0 means unlimited"""
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount):
+        if self.capacity <= 0:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def consume(self, amount):
+        # correct an estimate once the real usage is known, may go negative
+        if self.capacity > 0:
+            self._refill()
+            self.tokens -= amount
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def _is_rate_limited(error):
+    return getattr(error, 'status_code', None) == 429
+
+def _usage_tokens(result):
+    usage = getattr(result, 'usage', None)
+    return getattr(usage, 'total_tokens', None) if usage is not None else None
+
+class LLMScheduler:
+    def __init__(self, concurrency, rpm, tpm):
+        self.config = (concurrency, rpm, tpm)
+        self._counter = itertools.count()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-scheduler", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(concurrency, rpm, tpm), self._loop).result()
+
+    async def _setup(self, concurrency, rpm, tpm):
+        self._queue = asyncio.PriorityQueue()
+        self._rpm = TokenBucket(rpm)
+        self._tpm = TokenBucket(tpm)
+        self._cooldown_until = 0.0
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(concurrency)]
+
+    def submit(self, fn, est_tokens=0, priority=DEFAULT_PRIORITY):
+        """Run blocking `fn()` under the global limits, block the calling thread until it is done"""
+        future = concurrent.futures.Future()
+        job = (priority, next(self._counter), fn, est_tokens, future, 0)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return future.result()
+
+    async def _wait_cooldown(self):
+        while True:
+            delay = self._cooldown_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _worker(self):
+        while True:
+            priority, seq, fn, est_tokens, future, attempt = await self._queue.get()
+            try:
+                await self._run(priority, seq, fn, est_tokens, future, attempt)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, priority, seq, fn, est_tokens, future, attempt):
+        if attempt == 0 and not future.set_running_or_notify_cancel():
+            return
+        await self._wait_cooldown()
+        await self._rpm.acquire(1)
+        await self._tpm.acquire(est_tokens)
+        try:
+            result = await self._loop.run_in_executor(self._executor, fn)
+        except Exception as e:
+            if _is_rate_limited(e) and attempt < MAX_RATE_LIMIT_RETRIES:
+                wait = _retry_after(e) or min(60, 2 ** attempt)
+                # a 429 means the provider wants everyone to slow down, not only this request
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + wait)
+                rprint(f"[yellow]⏳ Rate limited by LLM provider, pausing all requests for {wait:.1f}s ({attempt + 1}/{MAX_RATE_LIMIT_RETRIES})[/yellow]")
+                self._queue.put_nowait((priority, seq, fn, est_tokens, future, attempt + 1))
+            else:
+                future.set_exception(e)
+            return
+        used = _usage_tokens(result)
+        if used:
+            self._tpm.consume(used - est_tokens)
+        future.set_result(result)
+
+    async def _drain(self):
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+
+    def close(self):
+        """Finish queued jobs, then stop the loop thread"""
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False)
+
+# ------------------------------
+# process-wide instance
+# ------------------------------
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    limits = load_key("llm_rate_limit")
+    config = (max(1, load_key("max_workers")), limits["rpm"], limits["tpm"])
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.config != config:
+            old = _scheduler
+            _scheduler = LLMScheduler(*config)
+            if old is not None:
+                threading.Thread(target=old.close, daemon=True).start()
+        return _scheduler
+
+def estimate_tokens(text):
+    # rough upper bound, real usage reported by the API is reconciled afterwards
+    return max(1, len(text) // 3)
@@ -1,16 +1,19 @@
+from core.utils.artifacts import ARTIFACT_EXT
+
 # ------------------------------------------
 # 定义中间产出文件
 # ------------------------------------------
 
-_2_CLEANED_CHUNKS = "output/log/cleaned_chunks.xlsx"
+_2_CLEANED_CHUNKS = f"output/log/cleaned_chunks{ARTIFACT_EXT}"
 _3_1_SPLIT_BY_NLP = "output/log/split_by_nlp.txt"
 _3_2_SPLIT_BY_MEANING = "output/log/split_by_meaning.txt"
 _4_1_TERMINOLOGY = "output/log/terminology.json"
-_4_2_TRANSLATION = "output/log/translation_results.xlsx"
-_5_SPLIT_SUB = "output/log/translation_results_for_subtitles.xlsx"
-_5_REMERGED = "output/log/translation_results_remerged.xlsx"
+_4_2_TRANSLATION = f"output/log/translation_results{ARTIFACT_EXT}"
+_5_SPLIT_SUB = f"output/log/translation_results_for_subtitles{ARTIFACT_EXT}"
+_5_REMERGED = f"output/log/translation_results_remerged{ARTIFACT_EXT}"
+_6_WORD_INDEX = "output/log/word_index.npz"
 
-_8_1_AUDIO_TASK = "output/audio/tts_tasks.xlsx"
+_8_1_AUDIO_TASK = f"output/audio/tts_tasks{ARTIFACT_EXT}"
 
 
 # ------------------------------------------
@@ -24,6 +27,7 @@ _BACKGROUND_AUDIO_FILE = "output/audio/background.mp3"
 _AUDIO_REFERS_DIR = "output/audio/refers"
 _AUDIO_SEGS_DIR = "output/audio/segs"
 _AUDIO_TMP_DIR = "output/audio/tmp"
+_AUDIO_PCM_CACHE_DIR = "output/audio/pcm_cache"
 
 # ------------------------------------------
 # 导出
@@ -37,6 +41,7 @@ __all__ = [
     "_4_2_TRANSLATION",
     "_5_SPLIT_SUB",
     "_5_REMERGED",
+    "_6_WORD_INDEX",
     "_8_1_AUDIO_TASK",
     "_OUTPUT_DIR",
     "_AUDIO_DIR",
@@ -45,5 +50,6 @@ __all__ = [
     "_BACKGROUND_AUDIO_FILE",
     "_AUDIO_REFERS_DIR",
     "_AUDIO_SEGS_DIR",
-    "_AUDIO_TMP_DIR"
+    "_AUDIO_TMP_DIR",
+    "_AUDIO_PCM_CACHE_DIR"
 ]
@@ -1,6 +1,8 @@
 import os
 import glob
 from core._1_ytdlp import find_video_files
+from core.utils.gpt_cache import export_gpt_log, close_connections
+from core.utils.pcm_cache import release_pcm_cache
 import shutil
 
 def cleanup(history_dir="history"):
@@ -18,6 +20,12 @@ def cleanup(history_dir="history"):
     os.makedirs(log_dir, exist_ok=True)
     os.makedirs(gpt_log_dir, exist_ok=True)
 
+    # Export readable gpt logs from the cache db before it is moved
+    export_gpt_log()
+    close_connections()
+    # decoded PCM is only a cache, do not archive it
+    release_pcm_cache(delete=True)
+
     # Move non-log files
     for file in glob.glob("output/*"):
         if not file.endswith(('log', 'gpt_log')):
@@ -0,0 +1,65 @@
+import os
+import shutil
+import hashlib
+import threading
+import subprocess
+import numpy as np
+from core.utils.models import _AUDIO_PCM_CACHE_DIR
+
+# ------------
+# decoded PCM cache
+# every source file is decoded once per sample rate to mono float32 raw PCM,
+# later reads are zero-copy slices of a memory map
+# ------------
+
+DEFAULT_SR = 16000
+
+_lock = threading.Lock()
+_maps = {}
+_hashes = {}
+
+def _content_hash(path):
+    st = os.stat(path)
+    stat_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if stat_key not in _hashes:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        _hashes[stat_key] = h.hexdigest()
+    return _hashes[stat_key]
+
+def _decode(path, sr, cache_file):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-f', 'f32le', '-ac', '1', '-ar', str(sr), '-'],
+                       stdout=f, stderr=subprocess.PIPE, check=True)
+    # readers only ever see a complete file
+    os.replace(tmp_file, cache_file)
+
+def load_pcm(path, sr=DEFAULT_SR):
+    """Mono float32 samples of `path` at `sr`, decoded on first use and memory-mapped afterwards"""
+    with _lock:
+        key = f"{_content_hash(path)}_{sr}"
+        if key not in _maps:
+            cache_file = os.path.join(_AUDIO_PCM_CACHE_DIR, f"{key}.f32")
+            if not os.path.exists(cache_file):
+                _decode(path, sr, cache_file)
+            if os.path.getsize(cache_file) == 0:
+                _maps[key] = np.zeros(0, dtype=np.float32)
+            else:
+                _maps[key] = np.memmap(cache_file, dtype=np.float32, mode='r')
+        return _maps[key]
+
+def load_pcm_segment(path, start, end, sr=DEFAULT_SR):
+    data = load_pcm(path, sr)
+    return data[int(start * sr):int(end * sr)]
+
+def release_pcm_cache(delete=False):
+    """Drop the memory maps, and with `delete` the cached files, e.g. before cleanup moves `output/`"""
+    with _lock:
+        _maps.clear()
+        _hashes.clear()
+        if delete:
+            shutil.rmtree(_AUDIO_PCM_CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,62 @@
+import math
+import numpy as np
+
+# ------------
+# WSOLA time-stretch on numpy arrays
+# pitch is kept, the output length is exactly round(len(x) / speed)
+# ------------
+
+FRAME_MS = 30
+TOLERANCE_MS = 10
+
+def _resample_linear(x, length):
+    # clips shorter than two frames are too short to overlap-add, plain interpolation is inaudible there
+    if length <= 0 or len(x) == 0:
+        return np.zeros((max(length, 0),) + x.shape[1:], dtype=x.dtype)
+    src = np.linspace(0, len(x) - 1, length)
+    if x.ndim == 1:
+        return np.interp(src, np.arange(len(x)), x).astype(x.dtype)
+    return np.stack([np.interp(src, np.arange(len(x)), x[:, c]) for c in range(x.shape[1])], axis=1).astype(x.dtype)
+
+def wsola_stretch(x, speed, sr):
+    """Play `x` (samples or samples x channels) `speed` times faster"""
+    length = int(round(len(x) / speed))
+    if abs(speed - 1.0) < 0.001:
+        return _resample_linear(x, length) if length != len(x) else x.copy()
+
+    win = max(4, int(sr * FRAME_MS / 1000) // 2 * 2)
+    hop = win // 2
+    tol = int(sr * TOLERANCE_MS / 1000)
+    if len(x) < 2 * win or length < 2 * win:
+        return _resample_linear(x, length)
+
+    signal = x.astype(np.float64)
+    mono = signal if signal.ndim == 1 else signal.mean(axis=1)
+    frames = math.ceil((length + hop) / hop) + 1
+    front = int(math.ceil(hop * speed)) + tol + 1
+    needed = front + int(math.ceil(frames * hop * speed)) + tol + 2 * win
+    pad = [(front, max(0, needed - front - len(x)))] + [(0, 0)] * (signal.ndim - 1)
+    signal = np.pad(signal, pad)
+    mono = np.pad(mono, pad[0])
+
+    # periodic hann at 50% overlap sums to one
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(win) / win)
+    if signal.ndim > 1:
+        window = window[:, None]
+    out = np.zeros((frames * hop + win,) + signal.shape[1:])
+
+    prev = None
+    for k in range(frames):
+        nominal = front + int(round((k - 1) * hop * speed))
+        if prev is None:
+            pos = nominal
+        else:
+            # pick the candidate most similar to the natural continuation of the previous frame
+            template = mono[prev + hop:prev + hop + win]
+            region = mono[nominal - tol:nominal + tol + win]
+            corr = np.correlate(region, template, mode='valid')
+            pos = nominal - tol + int(np.argmax(corr)) if corr.max() > 0 else nominal
+        out[k * hop:k * hop + win] += window * signal[pos:pos + win]
+        prev = pos
+
+    return out[hop:hop + length].astype(x.dtype)
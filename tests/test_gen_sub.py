@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from core._6_gen_sub import fuzzy_find, get_sentence_timestamps
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    # the word index is persisted under output/log relative to the working dir
+    monkeypatch.chdir(tmp_path)
+
+def make_words(text):
+    words = text.split()
+    return pd.DataFrame({
+        'text': words,
+        'start': [float(i) for i in range(len(words))],
+        'end': [i + 0.5 for i in range(len(words))]
+    })
+
+def test_exact_sentences():
+    df_words = make_words("Hello, world. This is a test.")
+    df_sentences = pd.DataFrame({'Source': ["Hello world.", "This is a test"]})
+    assert get_sentence_timestamps(df_words, df_sentences) == [(0.0, 1.5), (2.0, 5.5)]
+
+def test_fuzzy_accepts_small_typo():
+    df_words = make_words("the quick brown fox jumps over the lazy dog")
+    df_sentences = pd.DataFrame({'Source': ["the quick brown fox", "jumps ovr the lazy dog"]})
+    assert get_sentence_timestamps(df_words, df_sentences) == [(0.0, 3.5), (4.0, 8.5)]
+
+def test_fuzzy_accepts_typo_near_start():
+    df_words = make_words("the quick brown fox jumps over the lazy dog")
+    df_sentences = pd.DataFrame({'Source': ["the quick brown fox", "jumbs over the lazy dog"]})
+    assert get_sentence_timestamps(df_words, df_sentences) == [(0.0, 3.5), (4.0, 8.5)]
+
+def test_fuzzy_anchors_on_the_sentence_not_on_earlier_text():
+    # the first chars of the sentence also occur earlier in the window
+    filler = "abcxyzabcxyz" * 10
+    sentence = "abcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuvwxyzabcdefgh"
+    full_words_str = filler + sentence + filler
+    typo = sentence[:3] + "0" + sentence[4:]
+    assert fuzzy_find(full_words_str, typo, 0) == (len(filler), len(filler) + len(sentence))
+
+def test_fuzzy_rejects_scattered_match():
+    # every char of the sentence occurs in order, but spread over far more text
+    assert fuzzy_find("aqqqqbqqqqcqqqqdqqqqeqqqqf", "abcdef", 0) is None
+
+def test_non_matching_sentence_raises():
+    df_words = make_words("the quick brown fox jumps over the lazy dog")
+    df_sentences = pd.DataFrame({'Source': ["the quick brown fox", "completely unrelated words here"]})
+    with pytest.raises(ValueError):
+        get_sentence_timestamps(df_words, df_sentences)
+
+def test_scattered_sentence_raises():
+    df_words = make_words("aqqqq bqqqq cqqqq dqqqq eqqqq fqqqq")
+    df_sentences = pd.DataFrame({'Source': ["abcdef"]})
+    with pytest.raises(ValueError):
+        get_sentence_timestamps(df_words, df_sentences)